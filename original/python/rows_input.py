@@ -7,6 +7,16 @@
 2. 在窗口中输入要发送的文本行，每行文本结束后按Enter键。
 3. 可以使用热键（默认是Pause键）来启动或停止输入。
 4. 可以在窗口中勾选“窗口置顶”、“去除文本前后空格”和“粘贴模式”选项来调整功能。
+5. 按下热键后由后台输入线程模拟键盘输入，界面不会卡住；输入期间再次按下热键时，
+   按“连按处理”选项排队、合并或忽略，点击“取消输入”可停止当前行并把未输入的行放回文本框。
+   “每次行数”大于 1 时每次按键输入多行，行与行之间按下“分隔键”（回车/Tab）。
+   粘贴模式下用户的剪贴板只在一轮连续粘贴开始时保存一次，空闲后再恢复；
+   “粘贴等待”为替换剪贴板前距上次粘贴至少等待的时间，目标程序读取剪贴板较慢时可适当调大。
+6. 自动输入：设置节奏（每秒行数或每行间隔）后点击“开始”或按 F9 键，按固定节奏逐行输入，
+   每行之后按下“分隔键”（回车/Tab，选“无”则不按），点击“暂停”或按 F10 键暂停，
+   状态栏显示已输入行数与实测速率；输入节奏按绝对时刻排期，不会因为每行的输入耗时而累积变慢。
+7. 行数很多时可以点击“打开文件”直接从文本/CSV 文件中按需读取，文本框只显示接下来的若干行，
+   并显示已输入的行数；点击“关闭文件”回到手动编辑模式。
 注意事项：
 1. 请确保在运行脚本前，目标应用窗口已经激活。
 2. 输入的文本行将直接发送到当前活动窗口，请注意不要在其他重要操作中使用此脚本。
@@ -20,14 +30,153 @@
 """
 
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, ttk
+from tkinter import scrolledtext, messagebox, ttk, filedialog
 import keyboard
 import pyautogui
 import pyperclip
 import threading
 import time
+import os
+import queue
+from collections import deque
+
+class FileLineSource:
+    """
+    按需从文件中逐行读取文本的数据源。
+
+    文件以流的方式顺序读取，只在取行时读入，内存占用与文件大小无关；总行数由后台线程统计。
+    """
+    
+    # 统计行数时每次读取的字节数
+    COUNT_CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(self, path):
+        self.path = path
+        self.encoding = self.detect_encoding(path)
+        self._file = open(path, encoding=self.encoding, errors="replace", newline="")
+        # 文件总行数，后台统计完成前为 None
+        self.total = None
+    
+    @staticmethod
+    def detect_encoding(path):
+        """根据文件开头判断编码：能按 UTF-8 解码时使用 UTF-8（兼容 BOM），否则按 GBK 读取"""
+        with open(path, "rb") as f:
+            head = f.read(64 * 1024)
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # 读取的片段恰好截断了末尾的多字节字符时仍视为 UTF-8
+            if e.start < len(head) - 3:
+                return "gbk"
+        return "utf-8-sig"
+    
+    def read_line(self):
+        """读取下一行（不含换行符），文件读完时返回 None"""
+        line = self._file.readline()
+        if not line:
+            return None
+        return line.rstrip("\r\n")
+    
+    def count_lines(self):
+        """统计文件总行数，在后台线程中调用"""
+        count = 0
+        last = b""
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.COUNT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                count += chunk.count(b"\n")
+                last = chunk
+        # 最后一行没有换行符时也计为一行
+        if last and not last.endswith(b"\n"):
+            count += 1
+        self.total = count
+        return count
+    
+    def close(self):
+        self._file.close()
+
+class LineScheduler:
+    """
+    自动输入的节拍调度器。
+
+    第 n 行的输入时刻固定为 开始时刻 + n * 间隔，按绝对时刻等待而不是每行之后固定休眠，
+    输入本身耗费的时间不会累积成误差；等待用 Event 实现，暂停时立即唤醒，
+    最后 SPIN_TIME 秒改为让出时间片的忙等，弥补系统休眠精度的不足。
+    """
+    
+    # 距离输入时刻不足该秒数时改为忙等
+    SPIN_TIME = 0.002
+    
+    def __init__(self):
+        self.interval = 1.0
+        self.next_time = 0.0
+        self.wakeup = threading.Event()
+    
+    def start(self, interval):
+        """从当前时刻开始按 interval 秒的间隔排期"""
+        self.interval = interval
+        self.next_time = time.perf_counter()
+        self.wakeup.clear()
+    
+    def stop(self):
+        """唤醒正在等待的线程，使 wait 返回 False"""
+        self.wakeup.set()
+    
+    def wait(self):
+        """
+        等待到下一行的输入时刻。
+
+        :return: 到达输入时刻返回 True，被 stop 唤醒返回 False
+        """
+        while True:
+            remaining = self.next_time - time.perf_counter()
+            if remaining <= 0:
+                break
+            if remaining > self.SPIN_TIME:
+                if self.wakeup.wait(remaining - self.SPIN_TIME):
+                    return False
+            else:
+                time.sleep(0)
+            if self.wakeup.is_set():
+                return False
+        # 输入时刻已过（速率很高或落后时）不会进入上面的等待，仍需检查是否已被暂停或取消
+        if self.wakeup.is_set():
+            return False
+        now = time.perf_counter()
+        # 目标程序响应慢、落后超过一个间隔时从当前时刻重新排期，不连续补发积压的行
+        if now - self.next_time > self.interval:
+            self.next_time = now
+        self.next_time += self.interval
+        return True
 
 class TextLineInputter:
+    # 连按策略：输入线程忙时再次按下热键的处理方式
+    PRESS_POLICIES = {
+        "排队": "queue",      # 依次加入待输入队列，队列满时忽略
+        "合并": "coalesce",   # 已有等待输入的行时忽略，最多只有一批在等待
+        "忽略": "drop",       # 正在输入时忽略
+    }
+    # 普通模式下每次输入的字符数，每段之间检查是否被取消
+    TYPE_CHUNK = 16
+    # 批量输入时行与行之间按下的分隔键
+    SEPARATOR_KEYS = {
+        "回车": "enter",
+        "Tab": "tab",
+        "无": None,
+    }
+    # 最后一次粘贴后空闲多少秒恢复用户的剪贴板
+    CLIPBOARD_RESTORE_IDLE = 1.0
+    # 自动输入的节奏设置方式
+    FEED_PACES = {
+        "每秒行数": "rate",
+        "每行间隔(毫秒)": "delay",
+    }
+    # 自动输入时预先放入待输入队列的行数，以及主线程补充队列的间隔（毫秒）
+    FEED_PREFETCH = 64
+    FEED_PUMP_INTERVAL = 20
+    
     def __init__(self, root):
         self.root = root
         self.root.title("文本行输入器")
@@ -44,14 +193,55 @@ class TextLineInputter:
         
         # 热键状态
         self.hotkey = 'pause'
+        self.feed_start_hotkey = 'f9'
+        self.feed_pause_hotkey = 'f10'
         self.running = True
         
         # 上次输入内容
         self.last_input = ""
         
+        # 待输入的文本行队列，与文本框中的行一一对应；文本框被用户编辑后，下次取行时重新同步
+        self.pending_lines = deque()
+        
+        # 文件模式：按需读取的数据源、文本框中显示的行数、已输入的行数
+        self.line_source = None
+        self.window_size = 200
+        self.consumed_lines = 0
+        
+        # 输入线程：主线程只把文本行放入有界队列，由输入线程模拟键盘输入
+        self.inject_queue = queue.Queue(maxsize=100)
+        self.injecting = False
+        self.press_policy = "queue"
+        # 取消计数，输入线程发现其变化时停止输入当前行
+        self.cancel_generation = 0
+        
+        # 粘贴与批量输入：每次按键输入的行数、行间分隔键、粘贴后替换剪贴板前的等待秒数
+        self.batch_size = 1
+        self.separator_key = "enter"
+        self.paste_settle = 0.05
+        # 一轮连续粘贴开始前保存的用户剪贴板内容，恢复后为 None
+        self.saved_clipboard = None
+        self.last_paste_time = 0.0
+        # 输入线程当前批次中已完整输入的行数
+        self.inject_progress = 0
+        # pyautogui 默认每次调用后暂停 0.1 秒，会把自动输入限制在每秒几行；
+        # 输入节奏改由粘贴等待和自动输入的调度器控制
+        pyautogui.PAUSE = 0
+        
+        # 自动输入：按固定节奏逐行输入，不需要每行按一次热键
+        self.feeding = False
+        self.feed_interval = 0.1
+        self.feed_scheduler = LineScheduler()
+        self.fed_lines = 0
+        self.feed_start_time = 0.0
+        
         # 创建UI元素
         self.create_widgets()
         
+        # 启动输入线程
+        self.injection_thread = threading.Thread(target=self.injection_worker, daemon=True)
+        self.injection_thread.start()
+        
         # 启动热键监听线程
         self.hotkey_thread = threading.Thread(target=self.listen_hotkey, daemon=True)
         self.hotkey_thread.start()
@@ -106,6 +296,130 @@ class TextLineInputter:
         )
         self.change_hotkey_btn.pack(side=tk.LEFT, padx=5)
         
+        # 打开文件按钮
+        self.open_file_btn = ttk.Button(
+            options_frame2,
+            text="打开文件",
+            command=self.open_file
+        )
+        self.open_file_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 关闭文件按钮
+        self.close_file_btn = ttk.Button(
+            options_frame2,
+            text="关闭文件",
+            command=self.close_file,
+            state=tk.DISABLED
+        )
+        self.close_file_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 第三排选项框架
+        options_frame3 = ttk.Frame(self.root)
+        options_frame3.pack(padx=10, pady=5, fill=tk.X)
+        
+        # 连按策略下拉框
+        ttk.Label(options_frame3, text="连按处理:", font=self.font).pack(side=tk.LEFT, padx=5)
+        self.press_policy_var = tk.StringVar(value="排队")
+        self.press_policy_combo = ttk.Combobox(
+            options_frame3,
+            textvariable=self.press_policy_var,
+            values=list(self.PRESS_POLICIES),
+            state="readonly",
+            width=6
+        )
+        self.press_policy_combo.bind("<<ComboboxSelected>>", self.change_press_policy)
+        self.press_policy_combo.pack(side=tk.LEFT, padx=5)
+        
+        # 取消输入按钮
+        self.cancel_btn = ttk.Button(
+            options_frame3,
+            text="取消输入",
+            command=self.cancel_input
+        )
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 第四排选项框架
+        options_frame4 = ttk.Frame(self.root)
+        options_frame4.pack(padx=10, fill=tk.X)
+        
+        # 每次按键输入的行数
+        ttk.Label(options_frame4, text="每次行数:", font=self.font).pack(side=tk.LEFT, padx=5)
+        self.batch_size_var = tk.StringVar(value=str(self.batch_size))
+        ttk.Spinbox(
+            options_frame4,
+            from_=1,
+            to=10000,
+            textvariable=self.batch_size_var,
+            width=6
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 行间分隔键
+        ttk.Label(options_frame4, text="分隔键:", font=self.font).pack(side=tk.LEFT, padx=5)
+        self.separator_var = tk.StringVar(value="回车")
+        ttk.Combobox(
+            options_frame4,
+            textvariable=self.separator_var,
+            values=list(self.SEPARATOR_KEYS),
+            state="readonly",
+            width=5
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 粘贴等待时间
+        ttk.Label(options_frame4, text="粘贴等待(毫秒):", font=self.font).pack(side=tk.LEFT, padx=5)
+        self.paste_settle_var = tk.StringVar(value=str(int(self.paste_settle * 1000)))
+        ttk.Spinbox(
+            options_frame4,
+            from_=0,
+            to=1000,
+            increment=10,
+            textvariable=self.paste_settle_var,
+            width=5
+        ).pack(side=tk.LEFT, padx=5)
+        
+        for var in (self.batch_size_var, self.separator_var, self.paste_settle_var):
+            var.trace_add("write", self.update_batch_options)
+        
+        # 第五排选项框架
+        options_frame5 = ttk.Frame(self.root)
+        options_frame5.pack(padx=10, pady=5, fill=tk.X)
+        
+        # 自动输入节奏
+        ttk.Label(options_frame5, text="自动输入:", font=self.font).pack(side=tk.LEFT, padx=5)
+        self.feed_pace_var = tk.StringVar(value="每秒行数")
+        ttk.Combobox(
+            options_frame5,
+            textvariable=self.feed_pace_var,
+            values=list(self.FEED_PACES),
+            state="readonly",
+            width=12
+        ).pack(side=tk.LEFT, padx=5)
+        self.feed_value_var = tk.StringVar(value=str(round(1 / self.feed_interval)))
+        ttk.Spinbox(
+            options_frame5,
+            from_=1,
+            to=100000,
+            textvariable=self.feed_value_var,
+            width=6
+        ).pack(side=tk.LEFT, padx=5)
+        
+        for var in (self.feed_pace_var, self.feed_value_var):
+            var.trace_add("write", self.update_feed_options)
+        
+        # 开始/暂停自动输入按钮
+        self.feed_start_btn = ttk.Button(
+            options_frame5,
+            text=f"开始({self.feed_start_hotkey.upper()})",
+            command=self.start_feed
+        )
+        self.feed_start_btn.pack(side=tk.LEFT, padx=5)
+        self.feed_pause_btn = ttk.Button(
+            options_frame5,
+            text=f"暂停({self.feed_pause_hotkey.upper()})",
+            command=self.pause_feed,
+            state=tk.DISABLED
+        )
+        self.feed_pause_btn.pack(side=tk.LEFT, padx=5)
+        
         # 说明标签
         self.instructions_var = tk.StringVar(value=f"请在下方输入多行文本，按下 {self.hotkey.upper()} 键将输入并删除第一行内容")
         instructions = ttk.Label(
@@ -139,6 +453,17 @@ class TextLineInputter:
         )
         self.text_area.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
         
+        # 文件模式下的读取位置标签
+        self.position_var = tk.StringVar()
+        self.position_label = ttk.Label(
+            self.root,
+            textvariable=self.position_var,
+            font=self.font,
+            foreground="gray",
+            anchor="w"
+        )
+        self.position_label.pack(padx=10, fill=tk.X)
+        
         # 状态标签
         self.status_var = tk.StringVar()
         self.status_var.set("就绪 - 请输入文本")
@@ -170,66 +495,422 @@ class TextLineInputter:
         status = "已开启粘贴模式" if self.paste_mode else "已关闭粘贴模式"
         self.status_var.set(status)
     
+    def open_file(self):
+        """打开文本/CSV 文件，按需读取其中的行，文本框只显示接下来的 window_size 行"""
+        path = filedialog.askopenfilename(
+            title="打开文件",
+            filetypes=[("文本文件", "*.txt *.csv *.tsv"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            source = FileLineSource(path)
+        except OSError as e:
+            messagebox.showerror("错误", f"打开文件失败: {str(e)}")
+            return
+        if self.line_source is not None:
+            self.line_source.close()
+        self.line_source = source
+        self.consumed_lines = 0
+        self.pending_lines = deque()
+        
+        # 文件模式下文本框只读，内容由程序维护；关闭撤销记录，否则每输入一行都会在撤销栈中累积记录，内存随已输入行数增长
+        self.text_area.configure(state=tk.NORMAL, undo=False)
+        self.text_area.delete("1.0", tk.END)
+        self.fill_window()
+        self.text_area.configure(state=tk.DISABLED)
+        self.text_area.edit_reset()
+        self.text_area.edit_modified(False)
+        
+        self.open_file_btn.configure(text="重新打开")
+        self.close_file_btn.configure(state=tk.NORMAL)
+        self.status_var.set(f"已打开文件: {os.path.basename(path)}")
+        self.update_position()
+        
+        # 后台统计总行数，完成后更新位置标签
+        def count_lines():
+            source.count_lines()
+            self.root.after(0, self.update_position)
+        threading.Thread(target=count_lines, daemon=True).start()
+    
+    def close_file(self):
+        """关闭文件，回到手动编辑模式"""
+        if self.line_source is None:
+            return
+        self.line_source.close()
+        self.line_source = None
+        self.pending_lines = deque()
+        self.text_area.configure(state=tk.NORMAL, undo=True)
+        self.text_area.delete("1.0", tk.END)
+        self.text_area.edit_reset()
+        self.text_area.edit_modified(False)
+        self.open_file_btn.configure(text="打开文件")
+        self.close_file_btn.configure(state=tk.DISABLED)
+        self.position_var.set("")
+        self.status_var.set("已关闭文件 - 请输入文本")
+    
+    def fill_window(self):
+        """从文件中读取行，补足文本框中显示的 window_size 行"""
+        while len(self.pending_lines) < self.window_size:
+            line = self.line_source.read_line()
+            if line is None:
+                break
+            # 文本框中已有内容时，新行前补一个换行符
+            self.text_area.insert(tk.END, "\n" + line if self.pending_lines else line)
+            self.pending_lines.append(line)
+    
+    def update_position(self):
+        """更新文件模式下的读取位置"""
+        source = self.line_source
+        if source is None:
+            return
+        total = "统计中" if source.total is None else source.total
+        self.position_var.set(
+            f"文件: {os.path.basename(source.path)}  已输入 {self.consumed_lines} 行 / 共 {total} 行"
+        )
+    
+    def sync_pending_lines(self):
+        """文本框被用户编辑过时，按当前内容重建待输入队列"""
+        # 文本框的修改标记只在用户编辑后为真，程序自身删除行后会清除该标记
+        if not self.text_area.edit_modified():
+            return
+        content = self.text_area.get("1.0", tk.END).rstrip("\n")
+        self.pending_lines = deque(content.split("\n")) if content else deque()
+        self.text_area.edit_modified(False)
+    
     def get_first_line(self):
         """获取并删除文本框中的第一行，根据设置决定是否去除空格"""
-        # 获取文本内容
-        content = self.text_area.get("1.0", tk.END).rstrip("\n")
+        # 文件模式下文本框只读；否则只有文本框被编辑过才需要重新读取内容，直接从队列中取行
+        if self.line_source is None:
+            self.sync_pending_lines()
         
-        if not content:
+        if not self.pending_lines:
             return None
         
-        # 找到第一行的结尾
-        first_line_end = content.find("\n")
-        if first_line_end == -1:  # 只有一行
-            first_line = content
-            new_content = ""
+        first_line = self.pending_lines.popleft()
+        
+        if self.line_source is not None:
+            self.text_area.configure(state=tk.NORMAL)
+        # 只删除文本框中的第一行，不重写其余内容；最后一行时连同末尾空行一起清空
+        if self.pending_lines:
+            self.text_area.delete("1.0", "2.0")
         else:
-            first_line = content[:first_line_end]
-            new_content = content[first_line_end+1:]
+            self.text_area.delete("1.0", tk.END)
+        if self.line_source is not None:
+            # 文件模式：从文件中补读一行到显示窗口末尾
+            self.fill_window()
+            self.text_area.configure(state=tk.DISABLED)
+            self.consumed_lines += 1
+            self.update_position()
+        # 每次删除作为独立的撤销步骤，并清除修改标记，避免下次取行时重新同步
+        self.text_area.edit_separator()
+        self.text_area.edit_modified(False)
         
         # 如果启用了去除空格选项，则处理当前行
         if self.trim_whitespace:
             first_line = first_line.strip()
         
-        # 更新文本框内容
-        self.text_area.delete("1.0", tk.END)
-        self.text_area.insert("1.0", new_content)
-        
         return first_line
     
     def input_first_line(self):
-        """输入第一行内容到当前光标位置"""
-        first_line = self.get_first_line()
+        """热键按下后在主线程中取出第一行（批量模式下取出多行），按连按策略交给输入线程，不在主线程中输入"""
+        if self.feeding:
+            self.status_var.set("正在自动输入，已忽略本次按键")
+            return
+        busy = self.injecting or not self.inject_queue.empty()
+        policy = self.press_policy
+        if policy == "drop" and busy:
+            self.status_var.set("正在输入，已忽略本次按键")
+            return
+        if policy == "coalesce" and not self.inject_queue.empty():
+            self.status_var.set("已有等待输入的行，本次按键已合并")
+            return
+        if self.inject_queue.full():
+            self.status_var.set(f"待输入队列已满（{self.inject_queue.maxsize} 批），已忽略本次按键")
+            return
         
-        if first_line is None:
+        lines = []
+        while len(lines) < self.batch_size:
+            line = self.get_first_line()
+            if line is None:
+                break
+            lines.append(line)
+        
+        if not lines:
             self.root.after(0, lambda: messagebox.showinfo("提示", "没有更多文本行可输入"))
             self.status_var.set("没有更多文本行可输入")
             return
         
-        # 根据模式选择输入方式
-        if self.paste_mode:
-            # 粘贴模式：使用剪贴板一次性粘贴
-            old_clipboard = pyperclip.paste()  # 保存原有剪贴板内容
-            pyperclip.copy(first_line)  # 设置新的剪贴板内容
-            pyautogui.hotkey('ctrl', 'v')  # 模拟粘贴操作
-            time.sleep(0.1)  # 等待粘贴完成
-            pyperclip.copy(old_clipboard)  # 恢复原有剪贴板内容
+        self.inject_queue.put_nowait((lines, False))
+        if busy:
+            self.status_var.set(f"已加入待输入队列，待输入 {self.inject_queue.qsize()} 批")
+    
+    def injection_worker(self):
+        """输入线程：依次从队列中取出一批文本行并输入到当前活动窗口，自动输入的行按调度器的节奏输入"""
+        while self.running:
+            try:
+                lines, paced = self.inject_queue.get(timeout=0.1)
+            except queue.Empty:
+                # 空闲一段时间后才恢复用户的剪贴板
+                self.restore_clipboard(idle_only=True)
+                continue
+            # 等待节拍期间也视为正在输入，避免自动输入被误判为已完成
+            self.injecting = True
+            if paced and not self.feed_scheduler.wait():
+                # 自动输入被暂停或取消，把已取出的行放回文本框开头
+                self.injecting = False
+                self.root.after(0, lambda lines=lines: self.restore_lines(lines))
+                continue
+            generation = self.cancel_generation
+            try:
+                completed = self.inject_lines(lines, generation, trailing_separator=paced)
+            except Exception as e:
+                # 输入失败（包括 pyautogui 的鼠标移到屏幕角落中止），把尚未输入完整的行放回文本框
+                self.root.after(0, lambda error=e, unsent=lines[self.inject_progress:]:
+                                self.on_inject_failed(error, unsent))
+                continue
+            finally:
+                self.injecting = False
+            self.root.after(0, lambda lines=lines, completed=completed, paced=paced:
+                            self.on_line_injected(lines, completed, paced))
+        self.restore_clipboard()
+    
+    def inject_lines(self, lines, generation, trailing_separator=False):
+        """
+        输入一批文本行，行与行之间按下分隔键，返回完整输入的行数（被取消时提前返回）。
+
+        trailing_separator 为 True 时最后一行之后也按下分隔键，自动输入时用于逐行提交表单。
+        输入过程中 inject_progress 记录已完整输入的行数，出错时据此放回尚未输入完整的行。
+        """
+        for index, line in enumerate(lines):
+            self.inject_progress = index
+            if self.cancel_generation != generation:
+                return index
+            if index and self.separator_key:
+                pyautogui.press(self.separator_key)
+            # 根据模式选择输入方式
+            if self.paste_mode:
+                # 粘贴模式：使用剪贴板一次性粘贴
+                self.paste_text(line)
+                self.root.after(0, lambda index=index: self.show_progress(index + 1, len(lines)))
+                continue
+            # 普通模式：分段逐字输入，每段之间检查是否被取消并汇报进度
+            for start in range(0, len(line), self.TYPE_CHUNK):
+                if self.cancel_generation != generation:
+                    return index
+                # 分段输入时关闭 pyautogui 每次调用后的默认暂停，避免逐段累积延迟
+                pyautogui.typewrite(line[start:start + self.TYPE_CHUNK], _pause=False)
+                typed = min(start + self.TYPE_CHUNK, len(line))
+                self.root.after(0, lambda index=index, typed=typed, total=len(line):
+                                self.show_progress(index + 1, len(lines), typed, total))
+        self.inject_progress = len(lines)
+        if trailing_separator and self.separator_key and self.cancel_generation == generation:
+            pyautogui.press(self.separator_key)
+        return len(lines)
+    
+    def wait_paste_settle(self):
+        """距离上次粘贴不足 paste_settle 秒时等待剩余时间，避免目标程序读取剪贴板前内容已被替换"""
+        remaining = self.paste_settle - (time.perf_counter() - self.last_paste_time)
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def paste_text(self, text):
+        """通过剪贴板粘贴文本；用户的剪贴板在一轮连续粘贴开始时保存一次，空闲后再恢复"""
+        if self.saved_clipboard is None:
+            self.saved_clipboard = pyperclip.paste()  # 保存原有剪贴板内容
+        # 只在替换剪贴板前等待上一次粘贴完成，粘贴后不再固定休眠
+        self.wait_paste_settle()
+        pyperclip.copy(text)  # 设置新的剪贴板内容
+        pyautogui.hotkey('ctrl', 'v')  # 模拟粘贴操作
+        self.last_paste_time = time.perf_counter()
+    
+    def restore_clipboard(self, idle_only=False):
+        """恢复用户的剪贴板；idle_only 为 True 时只在距离上次粘贴超过 CLIPBOARD_RESTORE_IDLE 秒后恢复"""
+        if self.saved_clipboard is None:
+            return
+        if idle_only and time.perf_counter() - self.last_paste_time < self.CLIPBOARD_RESTORE_IDLE:
+            return
+        self.wait_paste_settle()
+        pyperclip.copy(self.saved_clipboard)  # 恢复原有剪贴板内容
+        self.saved_clipboard = None
+    
+    def show_progress(self, line_index, line_count, typed=None, total=None):
+        """显示当前批次的输入进度"""
+        progress = f"第 {line_index}/{line_count} 行" if line_count > 1 else ""
+        if typed is not None:
+            progress += f" {typed}/{total} 个字符"
+        self.status_var.set(f"正在输入: {progress.strip()}，待输入 {self.inject_queue.qsize()} 批")
+    
+    def on_line_injected(self, lines, completed, paced=False):
+        """一批文本行输入结束后在主线程中更新界面，被取消时把尚未输入完整的行放回文本框开头"""
+        if paced:
+            self.fed_lines += completed
+        unsent = lines[completed:]
+        self.restore_lines(unsent)
+        # 最后一行完整输入的行；一行都没有输入完整时为 None，不更新上次输入内容
+        line = lines[completed - 1] if completed else None
+        if line is None:
+            display_text = "没有完整输入的行"
         else:
-            # 普通模式：逐字输入
-            pyautogui.typewrite(first_line)
-        
-        display_text = first_line if len(first_line) <= 30 else first_line[:30] + "..."
-        self.status_var.set(f"已输入: {display_text}")
+            display_text = line if len(line) <= 30 else line[:30] + "..."
+            if len(lines) > 1:
+                display_text = f"{completed}/{len(lines)} 行，最后一行 {display_text}"
+        pending = self.inject_queue.qsize()
+        pending_text = f"，待输入 {pending} 批" if pending else ""
+        if paced and self.feeding:
+            self.show_feed_rate()
+        elif completed == len(lines):
+            self.status_var.set(f"已输入: {display_text}{pending_text}")
+        else:
+            self.status_var.set(f"已取消: {display_text}，{len(unsent)} 行已放回文本框{pending_text}")
         
+        if line is None:
+            return
         # 更新上次输入内容
-        self.last_input = first_line
-        last_input_display = first_line if len(first_line) <= 50 else first_line[:50] + "..."
+        self.last_input = line
+        last_input_display = line if len(line) <= 50 else line[:50] + "..."
         self.last_input_var.set(f"上次输入: {last_input_display}")
     
+    def on_inject_failed(self, error, unsent):
+        """输入出错时在主线程中把尚未输入完整的行放回文本框开头，自动输入时先暂停，保持行的顺序"""
+        self.pause_feed()
+        self.restore_lines(unsent)
+        self.status_var.set(f"输入失败: {str(error)}，{len(unsent)} 行已放回文本框")
+    
+    def cancel_input(self):
+        """取消正在输入的行（同时停止自动输入），并把队列中尚未输入的行放回文本框开头"""
+        self.cancel_generation += 1
+        restored = self.stop_feed()
+        self.restore_lines(restored)
+        self.status_var.set(f"已取消输入，{len(restored)} 行已放回文本框")
+    
+    def drain_queue(self):
+        """清空待输入队列，返回其中尚未输入的行"""
+        restored = []
+        while True:
+            try:
+                lines, paced = self.inject_queue.get_nowait()
+            except queue.Empty:
+                return restored
+            restored.extend(lines)
+    
+    def restore_lines(self, restored):
+        """把尚未输入的行放回文本框开头"""
+        if restored:
+            if self.line_source is None:
+                # 输入期间界面可以编辑，先把用户的修改同步到待输入队列，否则放回后清除修改标记时这些修改会丢失
+                self.sync_pending_lines()
+            was_disabled = self.line_source is not None
+            if was_disabled:
+                self.text_area.configure(state=tk.NORMAL)
+            # 文本框中还有内容时，放回的行之后补一个换行符
+            text = "\n".join(restored)
+            self.text_area.insert("1.0", text + "\n" if self.pending_lines else text)
+            self.pending_lines.extendleft(reversed(restored))
+            if was_disabled:
+                self.text_area.configure(state=tk.DISABLED)
+                self.consumed_lines -= len(restored)
+                self.update_position()
+            self.text_area.edit_separator()
+            self.text_area.edit_modified(False)
+    
+    def update_batch_options(self, *args):
+        """读取批量行数、分隔键和粘贴等待时间，输入框内容不合法时保持原值"""
+        try:
+            self.batch_size = max(1, int(self.batch_size_var.get()))
+            self.paste_settle = max(0, int(self.paste_settle_var.get())) / 1000
+        except (tk.TclError, ValueError):
+            return
+        self.separator_key = self.SEPARATOR_KEYS[self.separator_var.get()]
+    
+    def update_feed_options(self, *args):
+        """读取自动输入的节奏，换算为每行的间隔秒数，输入框内容不合法时保持原值"""
+        try:
+            value = float(self.feed_value_var.get())
+        except (tk.TclError, ValueError):
+            return
+        if value <= 0:
+            return
+        if self.FEED_PACES[self.feed_pace_var.get()] == "rate":
+            self.feed_interval = 1 / value
+        else:
+            self.feed_interval = value / 1000
+        # 运行中修改节奏从下一行开始生效
+        self.feed_scheduler.interval = self.feed_interval
+    
+    def start_feed(self):
+        """开始（或暂停后继续）自动输入"""
+        if self.feeding:
+            return
+        if not self.pending_lines and self.line_source is None and not self.text_area.get("1.0", tk.END).strip():
+            self.status_var.set("没有更多文本行可输入")
+            return
+        # 先清空手动按键留在队列中的行，避免与自动输入的行混在一起
+        self.restore_lines(self.drain_queue())
+        self.feeding = True
+        self.fed_lines = 0
+        self.feed_start_time = time.perf_counter()
+        self.feed_scheduler.start(self.feed_interval)
+        self.feed_start_btn.configure(state=tk.DISABLED)
+        self.feed_pause_btn.configure(state=tk.NORMAL)
+        self.status_var.set(f"开始自动输入，目标 {1 / self.feed_interval:.1f} 行/秒")
+        self.pump_feed()
+    
+    def pause_feed(self):
+        """暂停自动输入，已取出但尚未输入的行放回文本框，正在输入的行会输入完整"""
+        if not self.feeding:
+            return
+        self.restore_lines(self.stop_feed())
+        self.status_var.set(f"已暂停自动输入，{self.feed_summary()}")
+    
+    def stop_feed(self):
+        """
+        停止自动输入的调度，返回待输入队列中尚未输入的行。
+
+        先清空队列再唤醒输入线程：输入线程被唤醒后不会再取到新的行，
+        它手中的行随后放回文本框开头，正好排在这里返回的行之前，顺序不变。
+        """
+        self.feeding = False
+        restored = self.drain_queue()
+        self.feed_scheduler.stop()
+        self.feed_start_btn.configure(state=tk.NORMAL)
+        self.feed_pause_btn.configure(state=tk.DISABLED)
+        return restored
+    
+    def pump_feed(self):
+        """自动输入期间在主线程中定时取行，使待输入队列中始终有 FEED_PREFETCH 行"""
+        if not self.feeding:
+            return
+        while self.inject_queue.qsize() < self.FEED_PREFETCH:
+            line = self.get_first_line()
+            if line is None:
+                break
+            self.inject_queue.put_nowait(([line], True))
+        if self.inject_queue.empty() and not self.injecting and not self.pending_lines:
+            self.stop_feed()
+            self.status_var.set(f"自动输入完成，{self.feed_summary()}")
+            return
+        self.root.after(self.FEED_PUMP_INTERVAL, self.pump_feed)
+    
+    def feed_summary(self):
+        """已自动输入的行数与实测速率"""
+        elapsed = time.perf_counter() - self.feed_start_time
+        rate = self.fed_lines / elapsed if elapsed > 0 else 0.0
+        return f"已输入 {self.fed_lines} 行，实测 {rate:.1f} 行/秒（目标 {1 / self.feed_interval:.1f}）"
+    
+    def show_feed_rate(self):
+        """自动输入期间显示进度与实测速率"""
+        self.status_var.set(f"自动输入中: {self.feed_summary()}，待输入 {self.inject_queue.qsize()} 行")
+    
+    def change_press_policy(self, event=None):
+        """切换连按策略"""
+        self.press_policy = self.PRESS_POLICIES[self.press_policy_var.get()]
+        self.status_var.set(f"连按处理: {self.press_policy_var.get()}")
+    
     def listen_hotkey(self):
         """监听热键的线程函数"""
         # 注册热键回调
-        keyboard.add_hotkey(self.hotkey, self.on_hotkey_pressed)
+        self.register_hotkeys()
         
         # 保持线程运行
         while self.running:
@@ -238,6 +919,12 @@ class TextLineInputter:
         # 清理热键
         keyboard.unhook_all()
     
+    def register_hotkeys(self):
+        """注册输入热键和自动输入的开始/暂停热键"""
+        keyboard.add_hotkey(self.hotkey, self.on_hotkey_pressed)
+        keyboard.add_hotkey(self.feed_start_hotkey, lambda: self.root.after(0, self.start_feed))
+        keyboard.add_hotkey(self.feed_pause_hotkey, lambda: self.root.after(0, self.pause_feed))
+    
     def change_hotkey(self):
         """更改热键的处理函数"""
         # 创建一个临时对话框
@@ -301,7 +988,7 @@ class TextLineInputter:
                 self.hotkey = new_hotkey
                 
                 # 重新注册热键
-                keyboard.add_hotkey(self.hotkey, self.on_hotkey_pressed)
+                self.register_hotkeys()
                 
                 # 更新说明标签
                 self.instructions_var.set(f"请在下方输入多行文本，按下 {self.hotkey.upper()} 键将输入并删除第一行内容")
@@ -328,6 +1015,13 @@ class TextLineInputter:
     def on_close(self):
         """窗口关闭时的处理"""
         self.running = False
+        self.cancel_generation += 1
+        self.feed_scheduler.stop()
+        # 输入线程是守护线程，空闲后才恢复剪贴板；退出前在主线程中立即恢复用户的剪贴板
+        # （不 join 输入线程：它通过 root.after 与主线程通信，在主线程中等待可能死锁）
+        self.restore_clipboard()
+        if self.line_source is not None:
+            self.line_source.close()
         self.root.destroy()
 
 def main():
@@ -4,18 +4,54 @@
 主要功能模块：
 1. 配置管理：通过 config 字典管理运行参数，包括运行时长、运算频率、CPU 核数和内存占用等。
 2. 时间格式化：time_str() 函数用于获取当前时间并格式化为包含周信息的字符串，方便日志输出。
-3. 内存和 CPU 模拟：exec_func() 函数模拟内存占用，并在指定时间内进行圆周率估算。
-4. 迭代次数测算：measure_iterations() 函数在迭代次数小于等于 1000 时，测算合适的迭代次数。
-5. 内存分配：split_mem_randomly() 函数将总内存随机分配到多个 CPU 核上。
-6. 主循环：main() 函数控制程序的主循环，按照随机参数创建并启动多个进程，模拟不同的运行环境。
+3. 内存和 CPU 模拟：exec_func() 函数为常驻工作进程入口，按控制通道下发的参数模拟内存占用，并持续进行圆周率估算。
+   设置目标 CPU 占用率时，run_duty_cycle() 函数以闭环方式控制忙/闲占空比，按实测占用率持续修正。
+   内存由 MemoryBallast 基于匿名 mmap 占用，逐页写入使其真正驻留，可逐步增减、定期重写保持热度、使用透明大页，
+   并从 /proc/self/status 读取实际驻留内存（RSS）与目标值对比。
+4. 批量计算核心：make_kernel() 函数创建按批处理随机点的计算核心，安装了 numpy 时使用 numpy 向量化计算，
+   否则使用 array 批量生成随机点，由 C 层迭代完成判断，避免逐点调用 random.random()。
+5. 迭代次数测算：measure_iterations() 函数在迭代次数小于等于 1000 时，测算合适的迭代次数。
+   用 perf_counter 对整批计算计时，不到 1 秒即可完成；结果按主机、CPU 型号和 Python 版本缓存到文件中，
+   之后启动时直接复用，运行脚本时加 --recalibrate 参数可强制重新测算。
+6. 内存分配：split_mem_randomly() 函数将总内存随机分配到多个 CPU 核上。
+7. 主循环：main() 函数创建常驻工作进程池（WorkerPool），进程数为 CPU 核数上限，
+   每个片段按照随机参数通过控制通道下发给工作进程，片段切换只需毫秒级，不再重复创建进程和分配内存；
+   各进程的内存占用通过共享额度（MemoryBudget）限制，总和不超过内存上限。
+8. 轨迹回放：指定轨迹文件（config['trace'] 或 --trace）时，replay_trace() 函数按文件中记录的
+   时间、核数、CPU 占用率和内存回放负载，以亚秒级节拍更新参数，支持插值、循环和变速回放，
+   可在测试环境中复现生产环境的负载曲线。
+9. 运行指标：工作进程把请求与实际的 CPU 占用率、内存写入共享数组，start_metrics() 函数在本机启动
+   Prometheus 文本格式的 HTTP 接口（/metrics），并可定期追加 JSONL 日志，便于与监控系统对照。
+10. 内存带宽压测：启用 config['bandwidth'] 后，工作进程在已占用的内存上按大块循环读、写、复制，
+    全部通过 memoryview 切片完成，按目标带宽限速并统计实际带宽（GB/秒），给内存总线施压。
 
 使用方法：直接运行脚本，按 Ctrl+C 可终止程序。
+    python thief-of-cpumem.py [--recalibrate] [--trace 轨迹文件] [--time-scale 倍数] [--no-loop]
+                              [--metrics-port 端口] [--metrics-log 日志路径]
 """
 from calendar import c
 import random
+import math
+import mmap
+import os
+import json
+import platform
+import argparse
+import bisect
+import csv
 import time
 import datetime
-from multiprocessing import Process
+from array import array
+from operator import gt
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Process, Pipe, Lock, RawArray
+try:
+    import numpy as np
+except ImportError:
+    # 未安装 numpy 时使用 array 计算核心
+    np = None
 
 # 配置参数，用于控制程序运行的各项随机参数
 config = {
@@ -39,10 +75,98 @@ config = {
         'min':1000,
         'max':5000
     },
+    # 5. 每个片段开始时，随机一个单个进程的目标 CPU 占用率（%），取值在 min 和 max 之间，闭环控制时生效
+    'cpu_percent':{
+        'min':20,
+        'max':80
+    },
+    # CPU 占用控制方式
+    'control':{
+        # closed 闭环：按目标占用率调节忙/闲占空比；open 开环：每算完一轮休眠 cpu_sleep_time 秒
+        'mode':'closed',
+        # 控制周期（秒），每个周期内先计算后休眠，结束时按实测占用率修正占空比
+        'period':0.1,
+        # 修正增益，每个周期把占空比调整 增益 × (目标占用率 - 实测占用率)
+        'gain':0.5,
+        # 计算阶段检查时间的粒度（秒），每次计算约该时长的随机点
+        'granularity':0.001
+    },
+    # 内存占用配置
+    'ballast':{
+        # 内存按该速度逐步增减（MB/秒），0 表示立即占用到目标值
+        'ramp_mb_per_sec':0,
+        # 每隔多少秒重新写入一遍已占用的页，保持其驻留在内存中，0 表示不重写
+        'retouch_interval':10,
+        # 是否使用透明大页（THP），仅 Linux 有效
+        'hugepage':False
+    },
+    # 内存带宽压测配置：启用后工作进程不再计算圆周率，改为在已占用的内存上循环读/写/复制，给内存总线施压
+    'bandwidth':{
+        'enabled':False,
+        # 每个片段开始时，随机一个单个进程的目标内存带宽（GB/秒），取值在 min 和 max 之间，0 表示不限速
+        'gb_per_sec':{
+            'min':1,
+            'max':5
+        },
+        # 每次读/写/复制的块大小（字节），应远大于 CPU 缓存
+        'block_size':4 * 1024 * 1024,
+        # 依次循环执行的操作：read 读取、write 写入、copy 复制
+        'ops':['read', 'write', 'copy']
+    },
     # 迭代次数，大于 1000 时生效，用于控制圆周率估算的计算量
-    'measure_iterations': 0
+    'measure_iterations': 0,
+    # 迭代次数测算配置
+    'calibration':{
+        # 测算结果缓存文件，按主机名、CPU 型号、Python 版本、计算核心和批大小分别保存
+        'cache_path':'~/.cache/thief-of-cpumem/calibration.json',
+        # 单次测量的最短耗时（秒），点数逐次倍增直到达到该耗时
+        'min_time':0.05,
+        # 测算总耗时上限（秒）
+        'time_limit':0.5
+    },
+    # 负载轨迹回放配置，指定 path 时按轨迹文件回放，不再随机生成片段参数
+    'trace':{
+        # 轨迹文件路径（CSV 或 JSONL），每条记录包含 timestamp、cores、cpu_percent、memory_mb
+        'path':None,
+        # 回放到末尾后是否从头循环
+        'loop':True,
+        # 回放速度倍数，2.0 表示以两倍速回放
+        'time_scale':1.0,
+        # 是否在相邻两条记录之间线性插值，False 时保持前一条记录的值直到下一条
+        'interpolate':True,
+        # 回放时每隔多少秒更新一次工作进程的参数
+        'step':0.5,
+        # 每隔多少秒输出一次当前回放进度
+        'report_interval':10
+    },
+    # 运行指标配置
+    'metrics':{
+        # HTTP 接口监听地址与端口，端口为 None 时不启动，0 表示随机端口
+        'host':'127.0.0.1',
+        'port':None,
+        # 工作进程采样实际 CPU 占用率与驻留内存的间隔（秒）
+        'sample_interval':1.0,
+        # JSONL 日志路径，None 表示不输出
+        'jsonl_path':None,
+        # JSONL 日志的输出间隔（秒）
+        'log_interval':5
+    },
+    # 计算核心：auto（安装了 numpy 时使用 numpy，否则使用 array）/ numpy / array
+    'kernel':'auto',
+    # 每批计算的随机点数量，越大解释器开销占比越小，单批耗时越长
+    'batch_size':65536
 }
 
+# array 计算核心的坐标精度（位），坐标为 [0, 2^16) 的整数
+ARRAY_COORD_BITS = 16
+
+MB = 1024 * 1024
+GB = 1024 * MB
+# 内存带宽压测支持的操作
+BANDWIDTH_OPS = ('read', 'write', 'copy')
+# 内存页大小，占用内存时每页写入一个字节
+PAGE_SIZE = mmap.PAGESIZE
+
 # 定义函数，用于获取当前时间并格式化为包含周信息的字符串
 def time_str():
     # 获取当前日期和时间
@@ -53,66 +177,625 @@ def time_str():
     formatted_time_isoweek = f' 周{isoweekday} | ' + now.strftime('%Y-%m-%d %H:%M:%S')
     return formatted_time_isoweek
 
-# 定义执行函数，模拟 CPU 和内存占用操作，并估算圆周率
-def exec_func(bt, ml, lt):
+# 定义函数，创建批量蒙特卡罗计算核心，返回的函数每次计算 points 个随机点，返回落在单位圆内的点数
+def make_kernel(kind=None, batch_size=None):
+    # 未指定时使用配置中的计算核心和批大小
+    kind = kind or config['kernel']
+    batch_size = batch_size or config['batch_size']
+    if kind == 'auto':
+        kind = 'array' if np is None else 'numpy'
+    if kind == 'numpy':
+        if np is None:
+            raise ValueError("未安装 numpy，无法使用 numpy 计算核心")
+        rng = np.random.default_rng()
+        # 预分配坐标缓冲区，每批就地生成随机数并就地计算，不再分配新数组
+        xs = np.empty(batch_size)
+        ys = np.empty(batch_size)
+
+        def numpy_kernel(points):
+            inside = 0
+            while points > 0:
+                n = min(points, batch_size)
+                x = xs[:n]
+                y = ys[:n]
+                rng.random(out=x)
+                rng.random(out=y)
+                # 就地计算 x*x + y*y
+                np.multiply(x, x, out=x)
+                np.multiply(y, y, out=y)
+                np.add(x, y, out=x)
+                inside += int(np.count_nonzero(x <= 1.0))
+                points -= n
+            return inside
+        return numpy_kernel
+    if kind == 'array':
+        rng = random.Random()
+        scale = 1 << ARRAY_COORD_BITS
+        # 预先计算每个 x 坐标对应的圆内 y 坐标上界，x*x + y*y < scale*scale 等价于 y < bound[x]
+        bound = [math.isqrt(scale * scale - x * x - 1) + 1 for x in range(scale)]
+        # Python 3.9 以下没有 randbytes，使用 getrandbits 代替
+        randbytes = getattr(rng, 'randbytes', None) or (lambda size: rng.getrandbits(size * 8).to_bytes(size, 'little'))
+
+        def array_kernel(points):
+            inside = 0
+            while points > 0:
+                n = min(points, batch_size)
+                # 一次生成整批坐标，交替存放 x 和 y
+                coords = array('H', randbytes(4 * n))
+                # 由 C 层迭代完成查表与比较，不逐点执行 Python 字节码
+                inside += sum(map(gt, map(bound.__getitem__, coords[0::2]), coords[1::2]))
+                points -= n
+            return inside
+        return array_kernel
+    raise ValueError(f"不支持的计算核心: {kind}，可选值: auto / numpy / array")
+
+# 定义函数，读取本进程实际驻留的内存（MB），非 Linux 平台返回 None
+def resident_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                # VmRSS 的单位为 kB
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+# 所有工作进程共享的内存额度，按进程槽位记录已占用量，保证各进程占用之和不超过上限
+class MemoryBudget:
+    def __init__(self, limit_mb, slots):
+        self.limit = limit_mb * MB
+        self._used = RawArray('q', slots)
+        self._lock = Lock()
+
+    # 为槽位 slot 申请 size 字节，额度不足时只分配剩余部分，返回实际分配的字节数（按页对齐）
+    def acquire(self, slot, size):
+        with self._lock:
+            granted = max(0, min(size, self.limit - sum(self._used))) // PAGE_SIZE * PAGE_SIZE
+            self._used[slot] += granted
+            return granted
+
+    # 归还槽位 slot 的 size 字节
+    def release(self, slot, size):
+        with self._lock:
+            self._used[slot] -= size
+
+    # 清零槽位 slot 的占用量，用于工作进程被杀死后内存已由系统回收的情况
+    def reset(self, slot):
+        with self._lock:
+            self._used[slot] = 0
+
+# 内存占用，基于匿名 mmap，只有写入过的页才会真正占用物理内存
+class MemoryBallast:
+    # capacity_mb 为最大占用量，构造时一次性预留地址空间，之后按目标值提交或释放页；
+    # budget 为共享内存额度，slot 为本进程在其中的槽位，增加占用前先申请额度
+    def __init__(self, capacity_mb, hugepage=False, budget=None, slot=0):
+        self.capacity = capacity_mb * MB
+        self._budget = budget
+        self._slot = slot
+        if hasattr(mmap, 'MAP_PRIVATE'):
+            # 只预留地址空间不预留交换空间，内存上限较大时也能映射成功
+            flags = mmap.MAP_PRIVATE | getattr(mmap, 'MAP_NORESERVE', 0)
+            self._map = mmap.mmap(-1, max(self.capacity, PAGE_SIZE), flags=flags)
+        else:
+            self._map = mmap.mmap(-1, max(self.capacity, PAGE_SIZE))
+        if hugepage and hasattr(mmap, 'MADV_HUGEPAGE'):
+            # 建议内核使用透明大页，减少页表开销与缺页次数
+            self._map.madvise(mmap.MADV_HUGEPAGE)
+        # 对整个映射区域的零拷贝视图，带宽压测时按块切片
+        self._view = memoryview(self._map)
+        # 带宽压测的写入源缓冲区，按块大小预分配一次
+        self._source = None
+        # 带宽压测的下一个块位置与操作序号
+        self._stream_offset = 0
+        self._stream_op = 0
+        # 带宽压测累计读写的字节数
+        self.moved = 0
+        # 已提交（写入过）的字节数，始终按页对齐
+        self.committed = 0
+        # 目标占用字节数
+        self.target = 0
+        self._last_tick = self._last_touch = time.monotonic()
+
+    # 设置目标占用量（MB），实际占用在 tick() 中按 ramp_mb_per_sec 逐步调整
+    def set_target(self, size_mb):
+        self.target = min(size_mb * MB, self.capacity)
+
+    # 逐页写入 [start, end) 范围，使其真正驻留在内存中
+    def _touch(self, start, end):
+        count = len(range(start, end, PAGE_SIZE))
+        if count:
+            # 步长切片赋值由 C 层完成，每页只写一个字节
+            self._map[start:end:PAGE_SIZE] = b'\x01' * count
+
+    # 释放 [start, end) 范围的页，归还物理内存
+    def _release(self, start, end):
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    # 定期调用：按速度向目标值提交或释放页，并按 retouch_interval 重写已占用的页
+    def tick(self):
+        now = time.monotonic()
+        elapsed = now - self._last_tick
+        self._last_tick = now
+        # 目标值向上按页对齐
+        target = -(-self.target // PAGE_SIZE) * PAGE_SIZE
+        delta = target - self.committed
+        rate = config['ballast']['ramp_mb_per_sec'] * MB
+        if delta and rate > 0:
+            # 按速度限制本次的调整量，至少调整一页
+            step = max(PAGE_SIZE, int(rate * elapsed) // PAGE_SIZE * PAGE_SIZE)
+            delta = max(-step, min(step, delta))
+        if delta > 0 and self._budget is not None:
+            # 额度不足时只占用到额度允许的量，等其他进程释放后再继续
+            delta = self._budget.acquire(self._slot, delta)
+        if delta > 0:
+            self._touch(self.committed, self.committed + delta)
+        elif delta < 0:
+            self._release(self.committed + delta, self.committed)
+            if self._budget is not None:
+                self._budget.release(self._slot, -delta)
+        self.committed += delta
+        interval = config['ballast']['retouch_interval']
+        if interval and now - self._last_touch >= interval:
+            self._touch(0, self.committed)
+            self._last_touch = now
+
+    # 在已占用的内存上执行一块带宽压测操作，返回读写的字节数，已占用的内存不足两块时返回 0
+    # 已占用区域分为前后两半，块位置在前一半中循环：read 扫描两半中对应的块，write 写入两半中对应的块，
+    # copy 把前一半的块复制到后一半，三种操作都读写 2 × 块大小 的内存，全部通过 memoryview 切片完成，不创建新对象
+    def stream(self, ops):
+        half = self.committed // 2 // PAGE_SIZE * PAGE_SIZE
+        block = min(config['bandwidth']['block_size'], half)
+        if block <= 0:
+            return 0
+        if self._source is None or len(self._source) != block:
+            self._source = memoryview(bytes(block))
+        offset = self._stream_offset
+        if offset + block > half:
+            offset = 0
+        op = ops[self._stream_op % len(ops)]
+        if op == 'read':
+            # 查找不存在的字节，由 C 层逐字节扫描整块内存
+            self._map.find(b'\xff', offset, offset + block)
+            self._map.find(b'\xff', half + offset, half + offset + block)
+        elif op == 'write':
+            self._view[offset:offset + block] = self._source
+            self._view[half + offset:half + offset + block] = self._source
+        elif op == 'copy':
+            self._view[half + offset:half + offset + block] = self._view[offset:offset + block]
+        else:
+            raise ValueError(f"不支持的内存带宽压测操作: {op}，可选值: {', '.join(BANDWIDTH_OPS)}")
+        self._stream_offset = offset + block
+        self._stream_op += 1
+        self.moved += 2 * block
+        return 2 * block
+
+    # 释放全部内存
+    def close(self):
+        if self._budget is not None:
+            self._budget.release(self._slot, self.committed)
+        self.committed = 0
+        # 释放切片视图后才能关闭映射
+        self._source = None
+        self._view.release()
+        self._map.close()
+
+# 定义函数，以闭环方式按目标占用率运行计算核心，直到 on_period 返回 True，
+# 返回 (整个过程的实际 CPU 占用率（%）, 结束时占空比相对目标占用率的修正量)
+# on_period 在每个控制周期开始时调用，其消耗的 CPU 时间计入占用率；sleep 用于休眠阶段，可替换为能被提前唤醒的等待；
+# correction 为上次调用返回的修正量，参数频繁更新（如轨迹回放）时沿用已学到的修正，不必每次从目标占用率重新收敛
+def run_duty_cycle(kernel, cpu_percent, chunk, on_period, sleep=time.sleep, correction=0.0):
+    # 获取控制参数
+    period = config['control']['period']
+    gain = config['control']['gain']
+    target = cpu_percent / 100
+    # 以目标占用率加上已学到的修正量作为初始占空比
+    duty = min(1.0, max(0.0, target + correction))
+    # 记录开始时的时钟和本进程已消耗的 CPU 时间
+    start_time = last_time = time.perf_counter()
+    start_cpu = last_cpu = time.process_time()
+    while not on_period():
+        # 计算阶段：每次计算一小块随机点，直到达到本周期的计算时长
+        busy_until = last_time + duty * period
+        while time.perf_counter() < busy_until:
+            kernel(chunk)
+        # 休眠阶段：休眠到本周期结束
+        idle = last_time + period - time.perf_counter()
+        if idle > 0:
+            sleep(idle)
+        # 实测本周期的 CPU 占用率，被其他进程抢占时实测值偏低，占空比随之提高
+        now = time.perf_counter()
+        cpu = time.process_time()
+        achieved = (cpu - last_cpu) / (now - last_time)
+        last_time, last_cpu = now, cpu
+        # 按误差修正占空比，限制在 0 ~ 1 之间
+        duty = min(1.0, max(0.0, duty + gain * (target - achieved)))
+    achieved = (time.process_time() - start_cpu) / max(time.perf_counter() - start_time, 1e-9) * 100
+    return achieved, duty - target
+
+# 每个工作进程的运行指标：请求/实际 CPU 占用率（%）、请求/实际驻留内存（MB）、请求/实际内存带宽（GB/秒）
+METRIC_FIELDS = (
+    'requested_cpu_percent', 'achieved_cpu_percent', 'requested_memory_mb', 'resident_memory_mb',
+    'requested_bandwidth_gb_s', 'achieved_bandwidth_gb_s',
+)
+
+# 工作进程的空闲参数：不计算，内存目标为 0
+IDLE = (None, 0, None, False, None)
+
+# 定义函数，在已占用的内存上按目标带宽循环读/写/复制，直到 on_period 返回 True，返回 (读写字节数, 耗时秒数)
+# 每个控制周期读写 目标带宽 × 周期 字节后休眠到周期结束，gb_per_sec 为 0 时不限速
+def run_bandwidth(ballast, gb_per_sec, on_period, sleep=time.sleep):
+    period = config['control']['period']
+    ops = config['bandwidth']['ops']
+    quota = gb_per_sec * GB * period if gb_per_sec > 0 else math.inf
+    start_time = period_start = time.perf_counter()
+    total = 0
+    while not on_period():
+        deadline = period_start + period
+        moved = 0
+        # 每次一块，直到完成本周期的配额或周期结束
+        while moved < quota and time.perf_counter() < deadline:
+            size = ballast.stream(ops)
+            if size == 0:
+                # 内存尚未占用到足以压测，等待下个周期
+                break
+            moved += size
+        total += moved
+        idle = deadline - time.perf_counter()
+        if idle > 0:
+            sleep(idle)
+        period_start = max(deadline, time.perf_counter())
+    return total, time.perf_counter() - start_time
+
+# 定义执行函数，常驻工作进程的入口，模拟 CPU 和内存占用操作，并估算圆周率
+# 通过 conn 接收参数 (运算频率, 内存占用MB, 目标CPU占用率, 是否输出, 目标内存带宽GB/秒)，参数为 IDLE 时空闲，为 None 时退出；
+# 目标内存带宽不为 None 时在已占用的内存上压测内存带宽，
+# 否则目标CPU占用率不为 None 时按目标占用率闭环控制，否则每算完一轮休眠运算频率秒；
+# 是否输出为 True 时，参数切换时输出本片段的实际占用；metrics 为共享的运行指标数组，本进程写入第 slot 组；
+# parent_config 为主进程的 config，spawn 方式启动的子进程会重新导入本脚本，需要重新载入测算的迭代次数等配置
+def exec_func(conn, budget=None, slot=0, metrics=None, parent_config=None):
+    # 忽略 Ctrl+C，由主进程统一通知退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if parent_config is not None:
+        config.update(parent_config)
+    ballast = None
     try:
-        # 模拟内存占用，创建一个指定大小的字符串
-        cotext = ' ' * (ml * 1024 * 1024)
-    except MemoryError:
+        # 模拟内存占用，按内存上限一次性预留匿名内存映射，之后按每个片段的目标逐页写入或释放
+        ballast = MemoryBallast(config['memory_used_mb']['max'], config['ballast']['hugepage'], budget, slot)
+    except (MemoryError, OSError):
         # 捕获内存不足异常并打印提示信息
         print("剩余内存不足，内存有溢出......")
-    # 记录开始时间
-    start_time = time.time()
     # 获取配置中的迭代次数
     measure_iterations = config['measure_iterations']
-    # 在指定时间内持续进行圆周率估算
-    while time.time() - start_time < lt:
-        # 初始化圆内点的数量
-        inside = 0
-        # 进行指定次数的迭代
-        for i in range(0, measure_iterations):
-            # 生成随机点 (x, y)，范围在 [0, 1)
-            x = random.random()
-            y = random.random()
-            # 判断点是否在单位圆内
-            if x*x + y*y <= 1:
-                inside += 1
-        # 根据圆内点的数量估算圆周率
-        pi_estimate = 4 * inside / 960000
-        # 按照指定的运算频率时间进行休眠
-        time.sleep(bt)
+    # 创建批量计算核心
+    kernel = make_kernel()
+    # 测算的迭代次数对应 0.1 秒的计算量，按控制粒度换算每次计算的点数
+    chunk = max(1, int(measure_iterations * config['control']['granularity'] / 0.1))
+    params = IDLE
+    # 闭环控制学到的占空比修正量，在参数更新之间保留
+    correction = 0.0
+    # 本进程在运行指标数组中的起始下标，以及上次采样的时钟与 CPU 时间
+    base = slot * len(METRIC_FIELDS)
+    sample_interval = config['metrics']['sample_interval']
+    last_sample = [time.perf_counter(), time.process_time(), 0]
+
+    # 每个周期调整一次内存占用并检查控制通道，收到新参数时返回 True
+    def poll():
+        nonlocal params
+        if ballast is not None:
+            ballast.tick()
+        # 每隔 sample_interval 秒采样一次实际 CPU 占用率和驻留内存
+        now = time.perf_counter()
+        if metrics is not None and now - last_sample[0] >= sample_interval:
+            cpu = time.process_time()
+            metrics[base + 1] = (cpu - last_sample[1]) / (now - last_sample[0]) * 100
+            metrics[base + 3] = resident_mb() or 0
+            moved = ballast.moved if ballast is not None else 0
+            metrics[base + 5] = (moved - last_sample[2]) / (now - last_sample[0]) / GB
+            last_sample[:] = [now, cpu, moved]
+        changed = False
+        while conn.poll():
+            params = conn.recv()
+            changed = True
+        return changed
+
+    while params is not None:
+        bt, ml, cpu_percent, report, bandwidth = params
+        if ballast is not None:
+            ballast.set_target(ml)
+        if metrics is not None:
+            # 记录请求的占用，开环控制或带宽压测时没有目标占用率，记为 NaN
+            idle = bt is None
+            metrics[base] = 0 if idle else (math.nan if cpu_percent is None or bandwidth is not None else cpu_percent)
+            metrics[base + 2] = ml
+            metrics[base + 4] = 0 if idle or bandwidth is None else bandwidth
+        if bt is None:
+            # 空闲：不计算，只调整内存占用，等待新的参数
+            while not poll():
+                conn.poll(config['control']['period'])
+        elif bandwidth is not None:
+            if ballast is None:
+                # 内存映射失败时无法压测，只等待新的参数
+                while not poll():
+                    conn.poll(config['control']['period'])
+                continue
+            moved, elapsed = run_bandwidth(ballast, bandwidth, poll, conn.poll)
+            if report:
+                print(f"【{time_str()}】目标内存带宽:{bandwidth}GB/s 实际内存带宽:{moved / GB / max(elapsed, 1e-9):.2f}GB/s "
+                      f"{memory_str(ml)}")
+        elif cpu_percent is not None:
+            # 休眠阶段在控制通道上等待，收到新参数时立即切换
+            achieved, correction = run_duty_cycle(kernel, cpu_percent, chunk, poll, conn.poll, correction)
+            if report:
+                print(f"【{time_str()}】目标CPU占用率:{cpu_percent}% 实际CPU占用率:{achieved:.1f}% {memory_str(ml)}")
+        else:
+            # 在收到新参数前持续进行圆周率估算
+            while not poll():
+                # 按批计算指定数量的随机点，得到圆内点的数量
+                inside = kernel(measure_iterations)
+                # 根据圆内点的数量估算圆周率
+                pi_estimate = 4 * inside / measure_iterations
+                # 按照指定的运算频率时间进行休眠，收到新参数时提前唤醒
+                conn.poll(bt)
+            if report:
+                print(f"【{time_str()}】{memory_str(ml)}")
+    if ballast is not None:
+        ballast.close()
+
+# 定义函数，格式化目标内存与本进程实际驻留内存的对比
+def memory_str(ml):
+    rss = resident_mb()
+    return f"目标内存:{ml}MB 实际驻留内存:{'-' if rss is None else f'{rss:.0f}'}MB"
+
+# 常驻工作进程池，进程数固定为 CPU 核数上限，各片段只通过控制通道下发新参数，不再重复创建进程
+class WorkerPool:
+    def __init__(self, size):
+        # 所有工作进程共享的内存额度，各进程实际占用之和不超过内存上限
+        self.budget = MemoryBudget(config['memory_used_mb']['max'], size)
+        # 各工作进程的运行指标，每个进程一组 METRIC_FIELDS
+        self.metrics = RawArray('d', size * len(METRIC_FIELDS))
+        # 工作进程异常退出后被重新创建的次数
+        self.restarts = 0
+        # 已下发的片段数
+        self.slices = 0
+        # 当前下发的参数，参数不变时不重复下发
+        self.params_list = []
+        self.workers = [self._start(slot) for slot in range(size)]
+
+    # 创建槽位 slot 的工作进程，返回 [进程, 控制通道]
+    def _start(self, slot):
+        conn, child_conn = Pipe()
+        process = Process(target=exec_func, args=(child_conn, self.budget, slot, self.metrics, config), daemon=True)
+        process.start()
+        return [process, conn]
+
+    # 下发新片段的参数，前 len(params_list) 个进程按对应参数运行，其余进程空闲；
+    # 参数与当前参数相同时只重新创建已退出的工作进程，不打断其余进程，也不计为新的片段
+    def apply(self, params_list):
+        changed = params_list != self.params_list
+        for i, worker in enumerate(self.workers):
+            process, conn = worker
+            restarted = not process.is_alive()
+            if restarted:
+                # 工作进程被杀死（如内存不足）时重新创建；其占用的内存已由系统回收，归还内存额度
+                self.budget.reset(i)
+                width = len(METRIC_FIELDS)
+                self.metrics[i * width:(i + 1) * width] = [0.0] * width
+                worker[:] = self._start(i)
+                self.restarts += 1
+                print(f"【{time_str()}】工作进程 {process.pid} 已退出，重新创建为 {worker[0].pid}")
+            if changed or restarted:
+                worker[1].send(params_list[i] if i < len(params_list) else IDLE)
+        if changed:
+            self.params_list = list(params_list)
+            if params_list:
+                self.slices += 1
+
+    # 获取运行指标快照：各工作进程及汇总的请求/实际 CPU 占用率和内存，以及片段数和重启次数
+    def snapshot(self):
+        width = len(METRIC_FIELDS)
+        workers = [dict(zip(METRIC_FIELDS, self.metrics[i * width:(i + 1) * width])) for i in range(len(self.workers))]
+        total = {name:sum(worker[name] for worker in workers) for name in METRIC_FIELDS}
+        return {
+            'timestamp':time.time(),
+            'slices':self.slices,
+            'restarts':self.restarts,
+            'active_workers':sum(1 for worker in workers if worker['requested_memory_mb'] or worker['requested_cpu_percent']),
+            'workers':workers,
+            'total':total,
+        }
+
+    # 通知所有工作进程退出并等待结束
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, conn in self.workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+# 各运行指标的名称与说明，用于 Prometheus 输出
+METRIC_HELP = {
+    'requested_cpu_percent':'Requested CPU utilization in percent (NaN in open-loop mode)',
+    'achieved_cpu_percent':'Achieved CPU utilization in percent',
+    'requested_memory_mb':'Requested memory ballast in MB',
+    'resident_memory_mb':'Resident memory (VmRSS) in MB',
+    'requested_bandwidth_gb_s':'Requested memory bandwidth in GB/s',
+    'achieved_bandwidth_gb_s':'Achieved memory bandwidth in GB/s',
+}
+
+# 定义函数，格式化 Prometheus 样本值，NaN 需写作 NaN
+def prometheus_value(value):
+    return 'NaN' if math.isnan(value) else repr(float(value))
+
+# 定义函数，把运行指标快照中的 NaN 替换为 None，JSON 中没有 NaN，需写作 null
+def json_value(value):
+    if isinstance(value, dict):
+        return {key:json_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_value(item) for item in value]
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+# 定义函数，把运行指标快照格式化为 Prometheus 文本格式
+def render_prometheus(snapshot):
+    lines = []
+    for name in METRIC_FIELDS:
+        metric = f"thief_cpumem_{name}"
+        lines.append(f"# HELP {metric} {METRIC_HELP[name]} per worker")
+        lines.append(f"# TYPE {metric} gauge")
+        for i, worker in enumerate(snapshot['workers']):
+            lines.append(f'{metric}{{worker="{i}"}} {prometheus_value(worker[name])}')
+        # 汇总值是 gauge，不能使用计数器专用的 _total 后缀
+        lines.append(f"# HELP {metric}_sum {METRIC_HELP[name]} summed over workers")
+        lines.append(f"# TYPE {metric}_sum gauge")
+        lines.append(f"{metric}_sum {prometheus_value(snapshot['total'][name])}")
+    lines.append("# HELP thief_cpumem_active_workers Workers with a non-idle slice")
+    lines.append("# TYPE thief_cpumem_active_workers gauge")
+    lines.append(f"thief_cpumem_active_workers {snapshot['active_workers']}")
+    lines.append("# HELP thief_cpumem_slices_total Slices dispatched to the worker pool")
+    lines.append("# TYPE thief_cpumem_slices_total counter")
+    lines.append(f"thief_cpumem_slices_total {snapshot['slices']}")
+    lines.append("# HELP thief_cpumem_worker_restarts_total Workers restarted after exiting unexpectedly")
+    lines.append("# TYPE thief_cpumem_worker_restarts_total counter")
+    lines.append(f"thief_cpumem_worker_restarts_total {snapshot['restarts']}")
+    return "\n".join(lines) + "\n"
+
+# 运行指标 HTTP 接口，GET /metrics 返回 Prometheus 文本格式
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_prometheus(self.server.pool.snapshot()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # 不输出每次请求的访问日志
+    def log_message(self, format, *args):
+        pass
+
+# 定义函数，按配置启动运行指标 HTTP 接口和 JSONL 日志，返回停止它们的函数
+def start_metrics(pool):
+    metrics_config = config['metrics']
+    server = None
+    # 端口为 0 时由系统分配随机端口，只有 None 表示不启动
+    if metrics_config['port'] is not None:
+        server = ThreadingHTTPServer((metrics_config['host'], metrics_config['port']), MetricsHandler)
+        server.pool = pool
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"【{time_str()}】运行指标接口: http://{metrics_config['host']}:{server.server_port}/metrics")
+    stop_event = threading.Event()
+    logger = None
+    if metrics_config['jsonl_path']:
+        # 每隔 log_interval 秒追加一行运行指标快照
+        def write_log():
+            while not stop_event.wait(metrics_config['log_interval']):
+                with open(metrics_config['jsonl_path'], 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(json_value(pool.snapshot()), ensure_ascii=False) + '\n')
+        logger = threading.Thread(target=write_log, daemon=True)
+        logger.start()
+
+    def stop():
+        stop_event.set()
+        if logger is not None:
+            logger.join()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    return stop
 
 # 此处重复导入 random 模块，可移除
 import random
 
-# 定义函数，用于测算合适的迭代次数
-def measure_iterations():
+# 定义函数，获取 CPU 型号，用作测算结果缓存的键
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+# 定义函数，生成测算结果缓存的键：主机名、CPU 型号、Python 版本、计算核心和批大小任一变化都需要重新测算
+def calibration_key():
+    kernel = config['kernel']
+    if kernel == 'auto':
+        kernel = 'array' if np is None else 'numpy'
+    return f"{platform.node()}|{cpu_model()}|{platform.python_version()}|{kernel}|{config['batch_size']}"
+
+# 定义函数，测算计算核心每秒能处理的随机点数
+def calibrate(kernel):
+    batch_size = config['batch_size']
+    min_time = config['calibration']['min_time']
+    time_limit = config['calibration']['time_limit']
+    start_time = time.perf_counter()
+    # 预热一批，排除首次调用的开销
+    kernel(batch_size)
+    # 逐次倍增点数，直到单次测量耗时不少于 min_time，使计时误差可以忽略
+    points = batch_size
+    while True:
+        begin = time.perf_counter()
+        kernel(points)
+        elapsed = time.perf_counter() - begin
+        if elapsed >= min_time:
+            break
+        points *= 2
+    best = points / elapsed
+    # 重复测量，相邻两次相差不超过 2% 或超过时间上限时结束，取最快的一次（受干扰最少）
+    while time.perf_counter() - start_time < time_limit:
+        begin = time.perf_counter()
+        kernel(points)
+        rate = points / (time.perf_counter() - begin)
+        converged = abs(rate - best) <= best * 0.02
+        best = max(best, rate)
+        if converged:
+            break
+    return best
+
+# 定义函数，用于测算合适的迭代次数；优先使用缓存的测算结果，recalibrate 为 True 时强制重新测算
+def measure_iterations(recalibrate=False):
     # 当配置中的迭代次数小于等于 1000 时，进行迭代次数测算
     if config['measure_iterations'] <= 1000:
+        cache_path = os.path.expanduser(config['calibration']['cache_path'])
+        key = calibration_key()
+        # 读取缓存文件，文件不存在或损坏时视为空缓存
+        cache = {}
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if not recalibrate and key in cache:
+            config['measure_iterations'] = cache[key]
+            print(f"【{time_str()}】使用缓存的测算结果，取值0.1秒次数:{config['measure_iterations']}")
+            return
         print(f"【{time_str()}】正在测算迭代次数...")
-        # 记录开始时间
-        start_time = time.time()
-        # 初始化迭代次数
-        iterations = 0
-        # 初始化已用时间
-        elapsed = 0
-        # 初始化圆内点的数量
-        inside = 0
-        # 持续运行 3 秒，测算迭代次数
-        while elapsed < 3:
-            # 生成随机点 (x, y)，范围在 [0, 1)
-            x = random.random()
-            y = random.random()
-            # 判断点是否在单位圆内
-            if x*x + y*y <= 1:
-                inside += 1
-            # 迭代次数加 1
-            iterations += 1
-            # 更新已用时间
-            elapsed = time.time() - start_time
-        # 根据 3 秒内的迭代次数计算 0.1 秒的迭代次数，并更新配置
-        config['measure_iterations'] = int(iterations / 30)
-        print(f"【{time_str()}】测算迭代次数完成，3秒内迭代次数:{iterations}，取值0.1秒次数:{config['measure_iterations']}")
+        start_time = time.perf_counter()
+        # 使用与 exec_func 相同的批量计算核心
+        rate = calibrate(make_kernel())
+        # 根据每秒处理的点数计算 0.1 秒的迭代次数，并更新配置
+        config['measure_iterations'] = int(rate / 10)
+        print(f"【{time_str()}】测算迭代次数完成，耗时:{time.perf_counter() - start_time:.2f}秒，"
+              f"每秒迭代次数:{int(rate)}，取值0.1秒次数:{config['measure_iterations']}")
+        # 保存测算结果，写入失败不影响运行
+        cache[key] = config['measure_iterations']
+        try:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"【{time_str()}】保存测算结果失败: {e}")
 
 # 定义函数，用于将一个整数值随机划分为指定数量的部分，确保各部分之和等于原数值
 def split_mem_randomly(value, num):
@@ -137,8 +820,102 @@ def split_mem_randomly(value, num):
     parts.append(value - sum(parts))
     return parts
 
+# 轨迹文件中每条记录的字段
+TRACE_FIELDS = ('timestamp', 'cores', 'cpu_percent', 'memory_mb')
+
+# 定义函数，把轨迹中的时间戳转换为秒数，支持数值秒数和 ISO 8601 格式的时间字符串
+def parse_timestamp(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.datetime.fromisoformat(str(value)).timestamp()
+
+# 定义函数，读取轨迹文件（CSV 或 JSONL），返回按时间排序的记录列表 [(相对秒数, 核数, CPU占用率, 内存MB)]
+def load_trace(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith(('.jsonl', '.json')):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    points = []
+    for row in rows:
+        missing = [name for name in TRACE_FIELDS if row.get(name) in (None, '')]
+        if missing:
+            raise ValueError(f"轨迹记录缺少字段 {', '.join(missing)}: {row}")
+        points.append((parse_timestamp(row['timestamp']), float(row['cores']),
+                       float(row['cpu_percent']), float(row['memory_mb'])))
+    if not points:
+        raise ValueError(f"轨迹文件 {path} 中没有记录")
+    points.sort()
+    # 时间从第一条记录开始计
+    origin = points[0][0]
+    return [(t - origin, cores, cpu_percent, memory_mb) for t, cores, cpu_percent, memory_mb in points]
+
+# 定义函数，取轨迹在 t 秒处的值 (核数, CPU占用率, 内存MB)，interpolate 为 True 时在相邻记录之间线性插值
+def sample_trace(points, times, t, interpolate=True):
+    i = bisect.bisect_right(times, t) - 1
+    if i < 0:
+        return points[0][1:]
+    if i >= len(points) - 1 or not interpolate:
+        return points[i][1:]
+    t0, *start = points[i]
+    t1, *end = points[i + 1]
+    ratio = (t - t0) / (t1 - t0) if t1 > t0 else 0
+    return tuple(a + (b - a) * ratio for a, b in zip(start, end))
+
+# 定义函数，按轨迹文件回放负载，每隔 step 秒按轨迹当前位置更新工作进程的参数
+def replay_trace(pool, points):
+    trace_config = config['trace']
+    times = [point[0] for point in points]
+    duration = times[-1]
+    step = trace_config['step']
+    time_scale = trace_config['time_scale']
+    size = len(pool.workers)
+    print(f"【{time_str()}】开始回放轨迹，共 {len(points)} 条记录，时长:{duration:.1f}秒，回放速度:{time_scale}倍")
+    start_time = time.monotonic()
+    next_report = start_time
+    tick = 0
+    while True:
+        # 轨迹中的当前位置，循环回放时取余
+        t = (time.monotonic() - start_time) * time_scale
+        if t > duration:
+            if not trace_config['loop']:
+                break
+            t = t % duration if duration > 0 else 0
+        cores, cpu_percent, memory_mb = sample_trace(points, times, t, trace_config['interpolate'])
+        # 核数限制在 1 到工作进程数之间，内存平均分给各进程
+        cores = max(1, min(size, round(cores)))
+        memory_mb = max(0, int(memory_mb))
+        cpu_percent = max(0, min(100, round(cpu_percent, 1)))
+        pool.apply([(0, memory_mb // cores + (1 if i < memory_mb % cores else 0), cpu_percent, False, None)
+                    for i in range(cores)])
+        if time.monotonic() >= next_report:
+            print(f"【{time_str()}】轨迹位置:{t:.1f}秒 占用cpu核数:{cores} 目标CPU占用率:{cpu_percent}% 占用内存:{memory_mb}MB")
+            next_report += trace_config['report_interval']
+        # 按固定节拍更新，不累积误差
+        tick += 1
+        time.sleep(max(0, start_time + tick * step - time.monotonic()))
+    pool.apply([])
+    print(f"【{time_str()}】轨迹回放结束")
+
 # 定义主函数，程序的核心逻辑
 def main():
+    # 指定轨迹文件时先读取，格式错误时不必创建进程池
+    points = load_trace(config['trace']['path']) if config['trace']['path'] else None
+    # 按 CPU 核数上限创建常驻工作进程池
+    pool = WorkerPool(config['cpu_count']['max'])
+    stop_metrics = start_metrics(pool)
+    try:
+        if points is None:
+            run_slices(pool)
+        else:
+            replay_trace(pool, points)
+    finally:
+        stop_metrics()
+        pool.close()
+
+# 定义函数，循环生成随机片段参数并下发给工作进程池
+def run_slices(pool):
     while True:
         # 1. 划分随机时间片段，获取本次运行的时长
         runtime = random.randint(config['runtime']['min'], config['runtime']['max'])
@@ -148,40 +925,61 @@ def main():
         cpu_count = random.randint(config['cpu_count']['min'], config['cpu_count']['max'])
         # 4. 每个片段开始时，随机一个内存占用数值
         memory_used_mb = random.randint(config['memory_used_mb']['min'], config['memory_used_mb']['max'])
+        # 5. 闭环控制时，每个片段开始时随机一个单个进程的目标 CPU 占用率
+        cpu_percent = None
+        if config['control']['mode'] == 'closed':
+            cpu_percent = random.randint(config['cpu_percent']['min'], config['cpu_percent']['max'])
+        # 6. 启用内存带宽压测时，每个片段开始时随机一个单个进程的目标内存带宽
+        bandwidth = None
+        if config['bandwidth']['enabled']:
+            bandwidth = round(random.uniform(config['bandwidth']['gb_per_sec']['min'], config['bandwidth']['gb_per_sec']['max']), 2)
         # 打印当前运行参数信息
-        print(f"【{time_str()}】运行时长:{runtime} 运算频率:{cpu_sleep_time} 占用cpu核数:{cpu_count} 占用内存:{memory_used_mb}MB")
-
-        # 初始化进程列表
-        ps_list = []
-        # 尝试让进程列表中的进程结束，设置超时时间为 0.1 秒
-        for p in ps_list:
-            p.join(timeout=0.1)
-        # 清空进程列表
-        ps_list = []
+        if bandwidth is not None:
+            load_str = f"目标内存带宽:{bandwidth}GB/s"
+        elif cpu_percent is not None:
+            load_str = f"目标CPU占用率:{cpu_percent}%"
+        else:
+            load_str = f"运算频率:{cpu_sleep_time}"
+        print(f"【{time_str()}】运行时长:{runtime} {load_str} 占用cpu核数:{cpu_count} 占用内存:{memory_used_mb}MB")
+
         # 将内存占用数值随机划分为与 CPU 核数相同数量的部分
         mc = split_mem_randomly(memory_used_mb, cpu_count)
-        # 为每个 CPU 核创建一个进程
-        for i in range(0, cpu_count):
-            ps_list.append(Process(target=exec_func, args=(cpu_sleep_time, mc[i], runtime)))
-        # 启动所有进程
-        for p in ps_list:
-            p.start()
+        # 通过控制通道把参数下发给前 cpu_count 个工作进程，其余进程空闲
+        pool.apply([(cpu_sleep_time, mc[i], cpu_percent, True, bandwidth) for i in range(0, cpu_count)])
 
         # 记录开始时间
         start_time = time.time()
         # 在运行时长内每秒休眠一次
         while time.time() - start_time < runtime:
             time.sleep(1)
-        # 运行结束后，随机休眠 0.5 - 3 秒
+        # 运行结束后，所有工作进程空闲，随机休眠 0.5 - 3 秒
+        pool.apply([])
         time.sleep(round(random.uniform(0.5, 3), 2))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模拟 CPU 和内存占用")
+    parser.add_argument("--recalibrate", action="store_true", help="忽略缓存，重新测算迭代次数")
+    parser.add_argument("--trace", default=config['trace']['path'], help="按轨迹文件（CSV 或 JSONL）回放负载")
+    parser.add_argument("--time-scale", type=float, default=config['trace']['time_scale'], help="轨迹回放速度倍数")
+    parser.add_argument("--no-loop", action="store_true", help="轨迹回放到末尾后退出，不循环")
+    parser.add_argument("--metrics-port", type=int, default=config['metrics']['port'], help="运行指标 HTTP 接口端口")
+    parser.add_argument("--metrics-log", default=config['metrics']['jsonl_path'], help="运行指标 JSONL 日志路径")
+    args = parser.parse_args()
+    config['metrics']['port'] = args.metrics_port
+    config['metrics']['jsonl_path'] = args.metrics_log
+    config['trace']['path'] = args.trace
+    config['trace']['time_scale'] = args.time_scale
+    if args.no_loop:
+        config['trace']['loop'] = False
     # 调用测算迭代次数的函数
-    measure_iterations()
+    measure_iterations(args.recalibrate)
     try:
         # 持续运行主函数
         while True:
             main()
+            # 轨迹不循环回放时，回放结束即退出
+            if config['trace']['path'] and not config['trace']['loop']:
+                break
     except KeyboardInterrupt:
         # 捕获用户按下 Ctrl+C 中断程序的信号，打印退出信息
         print("程序已经退出!")
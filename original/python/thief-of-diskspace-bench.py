@@ -0,0 +1,291 @@
+"""
+thief-of-diskspace.py 的基准测试脚本。
+
+按 BENCH_CONFIG 中列出的参数（执行后端、线程数、文件宽高范围、负载数据模式、写入策略）做笛卡尔积，
+每个参数组合在独立的子进程中调用 write_data_to_files，向临时目录（tmpfs 或本地磁盘）写入固定体积的文件，
+记录吞吐（MB/s）、CPU 时间和峰值内存（RSS），输出对比表格，并把结果追加保存到 JSONL 文件中。
+
+每条结果都带有被测脚本内容的哈希作为版本号。再次运行时，会与其他版本中相同参数组合、
+相同主机、相同写入体积、临时目录位于同类文件系统的最近一次结果对比，吞吐下降超过阈值即判定为性能回退，
+脚本以非零状态码退出，便于在脚本修改前后做回归检测。
+
+使用方法：
+    # 使用默认参数，在 ./bench_scratch 下测试
+    python thief-of-diskspace-bench.py
+    # 在 tmpfs 上测试，每个组合写入 512MB
+    python thief-of-diskspace-bench.py --scratch /dev/shm/bench --volume 512
+
+注意：
+    1. 每个参数组合写完即删除生成的文件，临时目录需要至少 volume 大小的可用空间。
+    2. tmpfs 不支持 O_DIRECT，direct 写入策略在 tmpfs 上会记录为失败。
+    3. CPU 时间与峰值内存依赖 os.wait4，Windows 下不记录。
+"""
+import argparse
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# 被测脚本路径
+TARGET_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thief-of-diskspace.py")
+
+# 在模块级别载入被测脚本，spawn 方式启动的工作进程重新导入本脚本时也能找到其中的函数
+_spec = importlib.util.spec_from_file_location("thief_of_diskspace", TARGET_SCRIPT)
+diskspace = importlib.util.module_from_spec(_spec)
+sys.modules["thief_of_diskspace"] = diskspace
+_spec.loader.exec_module(diskspace)
+
+MB = diskspace.MB
+
+# 基准测试配置，列表中的取值做笛卡尔积
+BENCH_CONFIG = {
+    # 每个参数组合写入的总体积
+    "volume":256 * MB,
+    # 执行后端
+    "executor":["thread"],
+    # 线程数
+    "thread_count":[1, 4],
+    # 文件宽高范围，键为显示名称
+    "size":{
+        "tile":{"width":{"min":8000, "max":10000}, "height":{"min":3000, "max":4000}},
+        "small":{"width":{"min":4096, "max":4096}, "height":{"min":16, "max":64}},
+    },
+    # 负载数据模式
+    "payload_mode":["prng", "zero"],
+    # 写入策略
+    "write_strategy":["buffered", "writev"],
+    # 每次写入的字节数
+    "write_size":1 * MB,
+    # 吞吐下降超过该比例判定为性能回退
+    "regression_threshold":0.1,
+}
+
+
+def script_version():
+    """被测脚本内容的哈希，作为结果的版本号"""
+    with open(TARGET_SCRIPT, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def iter_cases():
+    """
+    按 BENCH_CONFIG 生成所有参数组合。
+
+    :return: 参数组合字典的生成器
+    """
+    for executor, thread_count, size_name, payload_mode, write_strategy in itertools.product(
+        BENCH_CONFIG["executor"], BENCH_CONFIG["thread_count"], BENCH_CONFIG["size"],
+        BENCH_CONFIG["payload_mode"], BENCH_CONFIG["write_strategy"]
+    ):
+        yield {
+            "executor":executor,
+            "thread_count":thread_count,
+            "size":size_name,
+            "payload_mode":payload_mode,
+            "write_strategy":write_strategy,
+        }
+
+
+def case_key(case):
+    """参数组合的唯一标识，用于跨版本对比"""
+    return "/".join(str(case[name]) for name in (
+        "executor", "thread_count", "size", "payload_mode", "write_strategy"
+    ))
+
+
+def run_one(case, output_dir, volume):
+    """
+    子进程入口：按参数组合配置被测脚本并执行一次写入。
+
+    :return: 写入结果概况
+    """
+    config = diskspace.CONFIG
+    config["executor"] = case["executor"]
+    config["thread_count"] = case["thread_count"]
+    config.update(BENCH_CONFIG["size"][case["size"]])
+    config["payload"]["mode"] = case["payload_mode"]
+    config["write"]["strategy"] = case["write_strategy"]
+    config["write"]["write_size"] = BENCH_CONFIG["write_size"]
+    config["report"]["interval"] = 0
+    config["report"]["json_path"] = None
+    try:
+        summary = diskspace.write_data_to_files(total_volume_limit=volume, output_dir=output_dir)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    report = summary["report"]
+    return {
+        "bytes":summary["bytes"],
+        "files":summary["files"],
+        "errors":summary["errors"][:3],
+        "duration_s":report["duration_s"],
+        "throughput_mb_s":report["throughput_mb_s"],
+    }
+
+
+def measure_case(case, scratch, volume):
+    """
+    在独立子进程中执行一个参数组合，记录吞吐、CPU 时间和峰值内存。
+
+    :return: 结果记录字典
+    """
+    output_dir = os.path.join(scratch, "run-" + case_key(case).replace("/", "-"))
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(case),
+        "--scratch", output_dir, "--volume", str(volume // MB)
+    ]
+    record = dict(case)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if hasattr(os, "wait4"):
+        # 先读完输出再回收子进程；stderr 在后台线程中同时读取，避免子进程因任一管道写满而阻塞
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()))
+        stderr_reader.start()
+        stdout = process.stdout.read()
+        stderr_reader.join()
+        stderr = stderr_chunks[0]
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        record["cpu_s"] = round(usage.ru_utime + usage.ru_stime, 3)
+        # Linux 下 ru_maxrss 单位为 KB，macOS 下为字节
+        rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        record["peak_rss_mb"] = round(rss / MB, 1)
+    else:
+        stdout, stderr = process.communicate()
+        record["cpu_s"] = None
+        record["peak_rss_mb"] = None
+    if process.returncode == 0:
+        record.update(json.loads(stdout.decode("utf-8").strip().splitlines()[-1]))
+        record["status"] = "error" if record["errors"] else "ok"
+    else:
+        record["status"] = "error"
+        record["errors"] = stderr.decode("utf-8", "replace").strip().splitlines()[-1:]
+        record["throughput_mb_s"] = None
+    return record
+
+
+def load_results(results_path):
+    """读取历史结果"""
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def scratch_filesystem(path):
+    """
+    临时目录所在文件系统的类型（如 tmpfs、ext4），按 /proc/mounts 中最长匹配的挂载点判断。
+
+    :return: 文件系统类型，无法判断（非 Linux）时返回 None
+    """
+    path = os.path.realpath(path)
+    best, fs_type = "", None
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # 挂载点中的空格等字符以八进制转义
+                mount_point = fields[1].encode().decode("unicode_escape")
+                if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) \
+                        and len(mount_point) > len(best):
+                    best, fs_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return fs_type
+
+
+# 结果可比的前提：除参数组合外，这些测试环境字段也必须一致
+BASELINE_FIELDS = ("host", "volume", "scratch_fs")
+
+
+def find_baseline(history, record):
+    """查找其他版本中相同参数组合、相同测试环境（主机、写入体积、临时目录文件系统）最近一次成功的结果"""
+    key = case_key(record)
+    for previous in reversed(history):
+        if (previous["version"] != record["version"] and previous["status"] == "ok"
+                and case_key(previous) == key
+                and all(previous.get(field) == record[field] for field in BASELINE_FIELDS)):
+            return previous
+    return None
+
+
+def print_table(records):
+    """输出对比表格"""
+    header = ("参数组合", "MB/s", "CPU(s)", "峰值RSS(MB)", "基线MB/s", "变化", "状态")
+    rows = []
+    for record in records:
+        baseline = record.get("baseline_mb_s")
+        change = record.get("change")
+        rows.append((
+            case_key(record),
+            "-" if record["throughput_mb_s"] is None else f"{record['throughput_mb_s']:.1f}",
+            "-" if record["cpu_s"] is None else f"{record['cpu_s']:.2f}",
+            "-" if record["peak_rss_mb"] is None else f"{record['peak_rss_mb']:.1f}",
+            "-" if baseline is None else f"{baseline:.1f}",
+            "-" if change is None else f"{change * 100:+.1f}%",
+            "回退" if record.get("regression") else record["status"],
+        ))
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="thief-of-diskspace.py 基准测试")
+    parser.add_argument("--scratch", default="./bench_scratch", help="临时输出目录（tmpfs 或本地磁盘）")
+    parser.add_argument("--volume", type=int, default=BENCH_CONFIG["volume"] // MB, help="每个参数组合写入的体积（MB）")
+    parser.add_argument("--results", default=None, help="结果文件路径，默认为临时目录下的 bench_results.jsonl")
+    parser.add_argument("--run-one", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    volume = args.volume * MB
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one), args.scratch, volume)))
+        return 0
+
+    os.makedirs(args.scratch, exist_ok=True)
+    results_path = args.results or os.path.join(args.scratch, "bench_results.jsonl")
+    history = load_results(results_path)
+    version = script_version()
+    scratch = os.path.abspath(args.scratch)
+    scratch_fs = scratch_filesystem(scratch)
+    records = []
+    threshold = BENCH_CONFIG["regression_threshold"]
+    for case in iter_cases():
+        print(f"正在测试 {case_key(case)} ...", flush=True)
+        record = measure_case(case, args.scratch, volume)
+        record.update(
+            version=version, volume=volume, host=platform.node(), scratch=scratch, scratch_fs=scratch_fs,
+            python=platform.python_version(), timestamp=time.strftime("%Y-%m-%d %H:%M:%S")
+        )
+        baseline = find_baseline(history, record)
+        if baseline is not None and record["throughput_mb_s"]:
+            record["baseline_version"] = baseline["version"]
+            record["baseline_mb_s"] = baseline["throughput_mb_s"]
+            record["change"] = record["throughput_mb_s"] / baseline["throughput_mb_s"] - 1
+            record["regression"] = record["change"] < -threshold
+        records.append(record)
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print()
+    print(f"版本 {version}，每个组合写入 {args.volume}MB，临时目录 {scratch}（{scratch_fs or '未知文件系统'}），"
+          f"结果已保存到 {results_path}")
+    print_table(records)
+    regressions = [record for record in records if record.get("regression")]
+    if regressions:
+        print(f"发现 {len(regressions)} 个参数组合吞吐下降超过 {threshold * 100:.0f}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 """
-此脚本使用多线程的方式生成指定体积的随机二进制文件，文件扩展名为 tile。
-可通过配置脚本中的 CONFIG 字典，灵活控制线程数、文件宽高范围等参数。
+此脚本使用多线程/多进程的方式生成指定体积的随机二进制文件，文件扩展名为 tile。
+可通过配置脚本中的 CONFIG 字典，灵活控制执行后端、线程数、文件宽高范围等参数。
 
 使用方法:
 1. 自行修改WORKLOAD（脚本运行一次的工作量）、OUTPUT_DIR（输出目录）
@@ -8,19 +8,85 @@
 3. 在 CONFIG 字典中修改参数，可调整线程数、文件宽度和高度的取值范围。
 4. 调用 write_data_to_files 函数，可自定义生成文件的总体积上限和输出目录。
 5. 直接运行脚本，会按默认参数生成总计 10MB 的随机文件到当前工作目录。
+6. 命令行：
+    python thief-of-diskspace.py [fill] [--volume MB] [--output DIR]
+    python thief-of-diskspace.py reclaim [--output DIR] [--workers N] [--target-free 比例]
+    python thief-of-diskspace.py verify [--output DIR] [--manifest PATH] [--workers N]
 
 生成文件名：
     1. 可在文件名中使用变量注入，如 %(level)d 表示文件层级，%(file_id)s 表示文件 ID，%(width)d 表示随机宽度，%(height)d 表示随机高度。
     2. 文件名中可使用 % 符号进行转义，如 %%(level)d 表示输出 % 符号和 level 变量。
+    3. 模板在每个工作线程启动时预编译一次（FileNamer），只计算模板中用到的变量；
+       file_id 由线程随机前缀加自增计数组成，不再为每个文件调用 uuid4()。
+
+目录布局（CONFIG["layout"]）：
+    flat    所有文件直接放在输出目录下（默认）
+    hash    按 file_id 的哈希分散到 depth 层、每层 fanout 个子目录中，如 3f/a2/xxx.tile
+    level   按文件层级放入子目录，如 L0/xxx.tile、L1/xxx.tile
+    子目录在开始写入前一次性创建，大量文件时可避免单目录过大导致查找与创建变慢。
 
 思路：
-    1. 计算每个线程需要生成的文件总体积，确保每个线程生成的文件总体积接近指定上限。
-    2. 每个线程内根据文件层级生成随机数量的文件，层级越高数量越多。
-    3. 每个线程内根据文件层级和数量，生成随机宽度和高度，并写入随机二进制数据。
+    1. 主进程按轮次规划文件任务（层级、宽度、高度），每轮根据文件层级生成随机数量的文件，层级越高数量越多。
+    2. 每个文件根据随机宽度和高度写入随机二进制数据。
         - 高度是指每个文件中，随机生成二进制数据的次数
         - 宽度是指内次随机生成的二进制数据长度
         - 即：每个文件中生成{高度}次{宽度}长的随机二进制数据
-    4. 每个线程内根据文件层级和数量，生成随机文件名，并写入文件。
+    3. 剩余体积不足一个完整文件时，规划一个"尾文件"，其大小恰好补足剩余体积，使总体积精确等于上限。
+    4. 文件任务放入共享的任务队列，空闲的工作线程从队列中领取任务、生成随机文件名并写入文件，
+       总耗时取决于整体带宽，而不是最慢的那个线程。
+    5. 工作线程可运行在单个进程内（thread），也可分布到多个进程（process / hybrid），
+       数据生成是 CPU 密集型操作，多进程可以绕开 GIL，按 CPU 核数扩展。
+       各工作线程的写入量与错误信息汇总回主进程，由 write_data_to_files 返回。
+    6. 写入的数据由负载数据生成器提供（见 CONFIG["payload"]），每个线程持有独立的生成器，
+       生成器复用预分配的缓冲区，整块填充后直接写入，避免逐字节调用 Python 层随机函数。
+
+负载数据模式（CONFIG["payload"]["mode"]）：
+    urandom         操作系统熵源，数据不可复现
+    prng            带种子的快速伪随机数生成器，整块填充缓冲区（默认）
+    zero            全零数据
+    sparse          全零数据，写入时以空洞代替实际写入，生成稀疏文件
+    compressible    可压缩数据，按 compress_ratio 控制压缩比，用于测试去重/压缩文件系统
+
+写入策略（CONFIG["write"]["strategy"]）：
+    buffered        经页缓存的普通写入（默认）
+    preallocate     先用 posix_fallocate 预分配整个文件，再写入数据
+    allocate        只用 posix_fallocate 分配区段，不写入数据，可快速占用空间
+    direct          O_DIRECT 直接写入，绕过页缓存，write_size 必须按 DIRECT_ALIGN 对齐
+    mmap            预设文件大小后 mmap 整个文件，负载数据直接生成到映射区域中
+    writev          每次用 os.writev 提交 writev_batch 个复用的缓冲区，减少系统调用次数
+    每次写入的大小由 write_size 决定，与文件的逻辑宽高无关；sync 控制刷盘策略：
+    none 不主动刷盘，file 每个文件写完刷盘一次，interval 每写入 sync_interval 字节刷盘一次。
+
+运行统计（CONFIG["report"]）：
+    每个工作线程记录写入字节数、文件数，以及 open / allocate / generate / write / fsync / close
+    各操作的耗时直方图（按 2 的幂分桶），每隔 interval 秒向主进程发布一次累计快照。
+    主进程定期在控制台输出一行吞吐与延迟概况，结束后可输出 JSON 报告（json_path）。
+    generate 占比高说明瓶颈在数据生成（CPU），write 占比高说明瓶颈在 I/O。
+
+目标占用率模式（CONFIG["occupancy"]）：
+    启用后忽略总体积上限，改为定期读取输出目录所在文件系统的使用情况，写到占用率达到 target 为止。
+    剩余量进入 slowdown_band 后逐步降低并发写入量，避免越过目标；hold 为 True 时达到目标后继续保持：
+    其他程序释放空间时补写，占用超出目标时删除或截断本次写入的文件（按内存中的文件账本，不扫描目录）。
+    按 Ctrl+C 时停止派发新任务并丢弃队列中尚未领取的任务，等待工作线程写完当前文件后退出；
+    再次按 Ctrl+C 立即退出（终止工作进程，工作线程为守护线程，随主线程退出）。
+
+限速（CONFIG["rate"]）：
+    基于令牌桶限制全局写入速率（bytes_per_sec）、单个工作线程写入速率（worker_bytes_per_sec）
+    和全局文件创建速率（files_per_sec），桶容量即允许的突发量（burst_bytes / burst_files）。
+    全局令牌桶的状态放在共享内存中，线程与进程后端都能共同限速；只限制实际写入的数据，
+    allocate 策略与 sparse 模式不消耗字节令牌。profile 可让限速随时间变化：
+    constant 恒定，ramp 在 period 秒内从 min 线性升到 max 后保持，
+    sine 以 period 为周期在 min 与 max 之间正弦变化，step 按 steps 中的 [持续秒数, 系数] 循环切换。
+
+文件清单（CONFIG["manifest"]）：
+    启用后每个文件在写入前后各追加一条记录（路径、大小、种子）到输出目录下的清单文件。
+    中断后再次运行时，从清单中统计已完成的体积，删除上次未写完的文件，只补写剩余部分。
+    reclaim 命令按清单多线程并行删除文件，不遍历目录树，可指定删除到文件系统空闲比例达到目标为止。
+
+文件校验（CONFIG["payload"]["per_file_seed"]、CONFIG["verify"]）：
+    启用 per_file_seed 后，每个文件的数据流从该文件的任务种子重新开始，且与写入块大小无关，
+    种子记录在清单中，也可通过 %(seed)x 写入文件名。verify 命令按种子重新生成预期数据，
+    多个线程/进程并行流式读取文件逐块比较，不需要预先保存校验和，同时输出读取吞吐。
 
 示例:
     # 生成 1GB 随机文件到 ./output 目录
@@ -28,9 +94,29 @@
 """
 import random
 import os
+import re
+import sys
+import argparse
+import math
+import zlib
+import mmap
+import shutil
+import signal
+import json
 import time
+import queue
+import itertools
+from collections import namedtuple, deque
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from uuid import uuid4
 import threading
+import multiprocessing
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，direct 写入策略不可用
+    fcntl = None
 
 BYTE = 1
 KB = 1024 * BYTE
@@ -44,12 +130,19 @@ OUTPUT_DIR = "./"
 # 支持变量注入：
 # level 层级        file_id 文件ID
 # width 宽度        height 高度
-# timestamp 时间戳
+# timestamp 时间戳  seed 文件种子（按文件种子生成数据时用于校验）
 FILE_NAME = "k%(level)d-%(file_id)s.tile"
 # 脚本配置字典，包含以下参数：
 CONFIG = {
+    # executor: 执行后端
+    #   thread  单进程多线程，共 thread_count 个线程
+    #   process 多进程，共 process_count 个进程，每个进程一个线程
+    #   hybrid  多进程多线程，共 process_count 个进程，每个进程 thread_count 个线程
+    "executor":"thread",
     # thread_count: 线程数
     "thread_count":4,
+    # process_count: 进程数，None 表示使用 CPU 核数
+    "process_count":None,
     # width: 文件宽度范围
     "width":{
         "min":8000 * BYTE,
@@ -59,90 +152,1899 @@ CONFIG = {
     "height":{
         "min":3000,
         "max":4000
+    },
+    # payload: 负载数据生成配置
+    "payload":{
+        # 生成模式：urandom / prng / zero / sparse / compressible
+        "mode":"prng",
+        # 随机种子，None 表示不固定；固定种子时每个线程使用 seed + 线程序号
+        "seed":None,
+        # compressible 模式下的目标压缩比（>= 1），如 2.0 表示可压缩到约 1/2
+        "compress_ratio":2.0,
+        # 是否按文件种子生成数据：每个文件从其任务种子重新开始数据流，内容可由 verify 命令重新生成并校验；
+        # 种子记录在清单中，或通过 %(seed)x 写入文件名，urandom 模式不支持
+        "per_file_seed":False
+    },
+    # write: 写入策略配置
+    "write":{
+        # 写入策略：buffered / preallocate / allocate / direct / mmap / writev
+        "strategy":"buffered",
+        # 每次写入的字节数，None 表示按文件宽度写入；direct 策略必须设置为 DIRECT_ALIGN 的整数倍
+        "write_size":None,
+        # 刷盘策略：none / file / interval
+        "sync":"none",
+        # 刷盘方式：fsync / fdatasync（不支持 fdatasync 的平台退回 fsync）
+        "sync_method":"fsync",
+        # interval 刷盘策略下，每写入多少字节刷盘一次
+        "sync_interval":64 * MB,
+        # writev 策略下，每次系统调用提交的缓冲区数量
+        "writev_batch":16
+    },
+    # occupancy: 目标占用率模式配置
+    "occupancy":{
+        # 是否启用，启用后 write_data_to_files 忽略 total_volume_limit
+        "enabled":False,
+        # 目标占用率（0 ~ 1）
+        "target":0.95,
+        # 轮询文件系统使用情况的间隔（秒）
+        "poll_interval":1.0,
+        # 剩余量小于容量的该比例时开始减速
+        "slowdown_band":0.02,
+        # 与目标的偏差小于容量的该比例时视为已达到目标
+        "tolerance":0.002,
+        # 达到目标后是否继续保持（补写或清理）
+        "hold":True,
+        # 保持的时长（秒），None 表示一直保持到 Ctrl+C
+        "hold_seconds":None
+    },
+    # layout: 目录布局配置
+    "layout":{
+        # 布局模式：flat / hash / level
+        "mode":"flat",
+        # hash 布局每层子目录数
+        "fanout":256,
+        # hash 布局的目录层数
+        "depth":1
+    },
+    # rate: 限速配置，速率为 None 表示不限制
+    "rate":{
+        # 全局写入速率上限（字节/秒）
+        "bytes_per_sec":None,
+        # 单个工作线程写入速率上限（字节/秒）
+        "worker_bytes_per_sec":None,
+        # 全局文件创建速率上限（个/秒）
+        "files_per_sec":None,
+        # 字节令牌桶容量（允许的突发字节数），None 表示 1 秒的量
+        "burst_bytes":None,
+        # 文件令牌桶容量（允许的突发文件数），None 表示 1 秒的量
+        "burst_files":None,
+        # 随时间变化的限速曲线，各速率上限乘以曲线给出的系数
+        "profile":{
+            # 曲线形状：constant / ramp / sine / step
+            "shape":"constant",
+            # ramp 的爬升时长、sine 的周期（秒）
+            "period":60,
+            # 系数范围
+            "min":0.2,
+            "max":1.0,
+            # step 曲线：[[持续秒数, 系数], ...]，循环执行
+            "steps":[[30, 0.5], [30, 1.0]]
+        }
+    },
+    # manifest: 文件清单配置
+    "manifest":{
+        # 是否记录文件清单
+        "enabled":False,
+        # 清单文件路径，None 表示输出目录下的 MANIFEST_NAME
+        "path":None,
+        # 清单已存在时是否从中续写（扣除已完成的体积）
+        "resume":True,
+        # reclaim 命令的并行删除线程数
+        "reclaim_workers":16
+    },
+    # verify: 校验配置
+    "verify":{
+        # 并行校验的工作线程数（thread 后端）或进程数（process / hybrid 后端）
+        "workers":4,
+        # 每次读取的字节数
+        "read_size":1 * MB
+    },
+    # report: 运行统计配置
+    "report":{
+        # 工作线程发布统计快照、主进程输出控制台进度行的间隔（秒），0 表示不输出进度行
+        "interval":1.0,
+        # JSON 报告输出路径，None 表示不输出
+        "json_path":None
     }
 }
 
-def generate_files_in_thread(output_dir, volume_per_thread):
+# 统计耗时的操作：open 打开文件，allocate 预分配/设置文件大小，throttle 等待限速，generate 生成负载数据，
+# write 写入数据，fsync 刷盘，close 关闭文件
+STAT_OPS = ("open", "allocate", "throttle", "generate", "write", "fsync", "close")
+# 耗时直方图的桶数，第 i 个桶统计耗时在 [2^(i-1), 2^i) 纳秒之间的样本
+HISTOGRAM_BUCKETS = 64
+
+# O_DIRECT 写入要求的缓冲区地址、写入大小和文件偏移对齐粒度
+DIRECT_ALIGN = 4 * KB
+# 支持的写入策略与刷盘策略
+WRITE_STRATEGIES = ("buffered", "preallocate", "allocate", "direct", "mmap", "writev")
+SYNC_POLICIES = ("none", "file", "interval")
+
+# 文件名模板支持的变量
+FILE_NAME_FIELDS = ("level", "file_id", "width", "height", "timestamp", "seed")
+# 解析文件名时各格式转换符对应的正则表达式与进制
+FILE_NAME_CONVERSIONS = {
+    "d":(r"-?\d+", 10), "i":(r"-?\d+", 10), "u":(r"-?\d+", 10),
+    "x":(r"[0-9a-f]+", 16), "X":(r"[0-9A-F]+", 16), "o":(r"[0-7]+", 8),
+}
+
+# 文件任务：level 层级，width 宽度，height 高度，size 文件大小，seed 文件种子
+# 普通文件 size == width * height，尾文件的 size 为补足总体积所需的剩余字节数
+FileJob = namedtuple("FileJob", ["level", "width", "height", "size", "seed"])
+
+# 默认的清单文件名
+MANIFEST_NAME = "tiles.manifest"
+# reclaim 命令每个删除任务包含的文件数
+RECLAIM_BATCH = 1000
+# verify 命令每个校验任务包含的文件数
+VERIFY_BATCH = 16
+
+# 可压缩数据的块大小，每块中前 1/压缩比 为随机数据，其余为零
+COMPRESS_BLOCK_SIZE = 4 * KB
+
+
+def _randbytes(rng, size):
     """
-    在单个线程中生成随机文件，直到达到该线程分配的体积上限。
+    使用指定的随机数生成器生成 size 字节的随机数据。
 
-    :param output_dir: 输出文件的目录路径
-    :param volume_per_thread: 当前线程需要生成的文件总体积上限，单位为字节
+    :param rng: random.Random 实例
+    :param size: 字节数
+    """
+    if hasattr(rng, "randbytes"):
+        return rng.randbytes(size)
+    # Python 3.9 以下没有 randbytes，使用 getrandbits 代替
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+class PayloadGenerator:
+    """
+    负载数据生成器基类。
+
+    每个生成器持有一块预分配的缓冲区，next_chunk 每次就地填充并返回缓冲区的 memoryview，缓冲区在各数据块之间复用。
+    urandom 模式直接读入缓冲区；prng / compressible 模式受限于 random.Random 只能返回新的 bytes 对象，
+    每个数据块仍会生成一份临时随机数据，再复制进缓冲区。缓冲区由匿名 mmap 分配，按页对齐，可直接用于 O_DIRECT 写入。
+    生成器不是线程安全的，每个线程需持有独立实例。
+    """
+    # 为 True 时表示数据全零，写入方应以空洞（seek）代替实际写入
+    sparse = False
+
+    def __init__(self, capacity, seed=None, **options):
+        self.capacity = 0
+        self.seed = seed
+        self._buffer = None
+        self._view = None
+        self._reserve(capacity)
+
+    def _reserve(self, capacity):
+        """确保缓冲区至少能容纳 capacity 字节"""
+        if capacity <= self.capacity:
+            return
+        self.capacity = capacity
+        self._buffer = mmap.mmap(-1, capacity)
+        self._view = memoryview(self._buffer)
+
+    def _fill(self, view):
+        """就地填充 view，由子类实现"""
+        raise NotImplementedError
+
+    def next_chunk(self, size):
+        """
+        生成 size 字节的数据。
+
+        :param size: 数据块大小，单位为字节
+        :return: 指向内部缓冲区的 memoryview，下次调用 next_chunk 前有效
+        """
+        self._reserve(size)
+        view = self._view[:size]
+        self._fill(view)
+        return view
+
+    def next_chunks(self, sizes):
+        """
+        一次生成多个数据块，各数据块位于内部缓冲区中互不重叠、按 COMPRESS_BLOCK_SIZE 对齐的区域。
+
+        :param sizes: 各数据块大小列表
+        :return: memoryview 列表，下次调用 next_chunk/next_chunks 前有效
+        """
+        stride = -(-max(sizes) // COMPRESS_BLOCK_SIZE) * COMPRESS_BLOCK_SIZE
+        self._reserve(stride * len(sizes))
+        views = []
+        for i, size in enumerate(sizes):
+            view = self._view[i * stride:i * stride + size]
+            self._fill(view)
+            views.append(view)
+        return views
+
+    def fill_into(self, view):
+        """
+        直接把数据生成到外部缓冲区（如文件映射区域），外部缓冲区需预先清零。
+
+        :param view: 可写的 memoryview
+        """
+        self._fill(view)
+
+    def reset(self, seed):
+        """
+        以新的种子重新开始数据流，用于按文件种子生成可复现的文件内容。
+
+        可复现的生成器保证数据流只取决于种子，与每次生成的块大小无关，
+        因此写入与校验可以使用不同的块大小。
+        """
+        self.seed = seed
+
+
+class _SeededStream:
+    """
+    带种子的随机字节流。
+
+    random.Random.randbytes 按 4 字节一组消耗随机数，直接按块调用时数据流会随块大小变化；
+    这里每次按 4 字节取整生成，多出的字节留给下一次，使数据流与每次取用的长度无关。
+    """
+
+    def __init__(self, seed):
+        self._rng = random.Random(seed)
+        self._carry = b""
+
+    def take_into(self, view):
+        """把接下来的 len(view) 字节写入 view，随机数据经 memoryview 直接复制，不再切片或拼接"""
+        size = len(view)
+        carry = self._carry
+        reused = min(len(carry), size)
+        view[:reused] = carry[:reused]
+        if reused == size:
+            self._carry = carry[reused:]
+            return
+        need = size - reused
+        data = memoryview(_randbytes(self._rng, (need + 3) & ~3))
+        view[reused:] = data[:need]
+        # 多出的不足 4 个字节留给下一次
+        self._carry = bytes(data[need:])
+
+
+class UrandomPayload(PayloadGenerator):
+    """操作系统熵源，POSIX 下直接从 /dev/urandom 读入缓冲区"""
+
+    def __init__(self, capacity, seed=None, **options):
+        super().__init__(capacity, seed)
+        try:
+            self._source = open("/dev/urandom", "rb", buffering=0)
+        except OSError:
+            # Windows 等没有 /dev/urandom 的平台退回 os.urandom
+            self._source = None
+
+    def reset(self, seed):
+        raise ValueError("urandom 模式的数据不可复现，不能按文件种子生成")
+
+    def _fill(self, view):
+        if self._source is None:
+            view[:] = os.urandom(len(view))
+            return
+        filled = 0
+        while filled < len(view):
+            filled += self._source.readinto(view[filled:])
+
+
+class PrngPayload(PayloadGenerator):
+    """带种子的伪随机数生成器，每次整块生成数据"""
+
+    def __init__(self, capacity, seed=None, **options):
+        super().__init__(capacity, seed)
+        self._stream = _SeededStream(seed)
+
+    def reset(self, seed):
+        super().reset(seed)
+        self._stream = _SeededStream(seed)
+
+    def _fill(self, view):
+        self._stream.take_into(view)
+
+
+class ZeroPayload(PayloadGenerator):
+    """全零数据，缓冲区分配后即为零，无需填充"""
+
+    def _fill(self, view):
+        pass
+
+
+class SparsePayload(ZeroPayload):
+    """全零数据，写入方以空洞代替写入"""
+    sparse = True
+
+
+class CompressiblePayload(PayloadGenerator):
+    """
+    可压缩数据。
+
+    数据流按 COMPRESS_BLOCK_SIZE 分块，每块只有前 1/compress_ratio 为随机数据，其余部分为零。
+    块边界按数据流中的绝对位置计算，而不是按每次生成的数据块计算，数据流与每次生成的大小无关。
+    """
+
+    def __init__(self, capacity, seed=None, compress_ratio=2.0, **options):
+        if compress_ratio < 1:
+            raise ValueError(f"compress_ratio 必须大于等于 1: {compress_ratio}")
+        super().__init__(capacity, seed)
+        self._stream = _SeededStream(seed)
+        self._random_size = max(1, int(COMPRESS_BLOCK_SIZE / compress_ratio))
+        self._zeros = memoryview(bytes(COMPRESS_BLOCK_SIZE))
+        # 随机数据的暂存区，在各数据块之间复用
+        self._noise = memoryview(bytearray(0))
+        # 数据流中的当前位置
+        self._offset = 0
+
+    def reset(self, seed):
+        super().reset(seed)
+        self._stream = _SeededStream(seed)
+        self._offset = 0
+
+    def _random_before(self, offset):
+        """数据流前 offset 字节中随机数据的字节数"""
+        return offset // COMPRESS_BLOCK_SIZE * self._random_size + min(offset % COMPRESS_BLOCK_SIZE, self._random_size)
+
+    def _fill(self, view):
+        size = len(view)
+        random_size = self._random_size
+        zeros = self._zeros
+        noise_size = self._random_before(self._offset + size) - self._random_before(self._offset)
+        if noise_size > len(self._noise):
+            self._noise = memoryview(bytearray(noise_size))
+        noise = self._noise[:noise_size]
+        self._stream.take_into(noise)
+        # 缓冲区会被复用，零区域也需要显式写入
+        position = self._offset % COMPRESS_BLOCK_SIZE
+        filled = used = 0
+        while filled < size:
+            if position < random_size:
+                length = min(random_size - position, size - filled)
+                view[filled:filled + length] = noise[used:used + length]
+                used += length
+            else:
+                length = min(COMPRESS_BLOCK_SIZE - position, size - filled)
+                view[filled:filled + length] = zeros[:length]
+            filled += length
+            position = (position + length) % COMPRESS_BLOCK_SIZE
+        self._offset += size
+
+
+# 负载数据模式与生成器的对应关系
+PAYLOAD_MODES = {
+    "urandom":UrandomPayload,
+    "prng":PrngPayload,
+    "zero":ZeroPayload,
+    "sparse":SparsePayload,
+    "compressible":CompressiblePayload,
+}
+
+
+def make_payload_generator(capacity, worker_id=0, payload_config=None):
+    """
+    根据配置创建负载数据生成器。
+
+    :param capacity: 预分配缓冲区大小，单位为字节
+    :param worker_id: 工作线程序号，固定种子时用于区分各线程的数据流
+    :param payload_config: 负载数据配置，默认为 CONFIG["payload"]
+    """
+    payload_config = dict(payload_config or CONFIG["payload"])
+    mode = payload_config.pop("mode", "prng")
+    if mode not in PAYLOAD_MODES:
+        raise ValueError(f"不支持的负载数据模式: {mode}，可选值: {', '.join(PAYLOAD_MODES)}")
+    seed = payload_config.pop("seed", None)
+    if seed is not None:
+        seed += worker_id
+    return PAYLOAD_MODES[mode](capacity, seed=seed, **payload_config)
+
+def _tail_job(level, width, size, seed):
+    """生成大小恰好为 size 的文件任务，宽度不超过 size"""
+    width = min(width, size)
+    return FileJob(level, width, (size + width - 1) // width, size, seed)
+
+
+def plan_file_jobs(total_volume_limit=None):
+    """
+    按轮次规划文件任务，直到总体积恰好等于上限。
+
+    每轮遍历 0 到 4 级，0 级生成 1 个文件，非 0 级生成 level + random(0, level) 个文件；
+    剩余体积不足一个完整文件时，最后生成一个大小恰好等于剩余体积的尾文件。
+
+    :param total_volume_limit: 文件总体积，单位为字节，None 表示不限（无限生成）
+    :return: FileJob 生成器
     """
     # 从配置中获取文件宽高的最小值和最大值
     width_min = CONFIG["width"]["min"]
     width_max = CONFIG["width"]["max"]
     height_min = CONFIG["height"]["min"]
     height_max = CONFIG["height"]["max"]
-    # 记录当前线程已生成文件的总体积
-    total_volume = 0
-    # 遍历 0 到 4 级别的文件生成
-    for level in range(0, 5):
-        if level == 0:
-            # 0 级文件生成 1 个
-            count = 1
+    # 剩余需要规划的体积
+    remaining = float("inf") if total_volume_limit is None else total_volume_limit
+    while remaining > 0:
+        # 遍历 0 到 4 级别的文件生成
+        for level in range(0, 5):
+            if level == 0:
+                # 0 级文件生成 1 个
+                count = 1
+            else:
+                # 非 0 级文件生成数量为当前级别数加上 0 到当前级别数的随机数
+                count = level + random.randint(0, level)
+            for _ in range(count):
+                # 随机生成文件的宽度和高度
+                width = random.randint(width_min, width_max)
+                height = random.randint(height_min, height_max)
+                # 计算当前文件的大小
+                file_size = width * height
+                # 每个文件一个种子，记录在清单中
+                seed = random.getrandbits(63)
+                if file_size >= remaining:
+                    # 剩余体积不足一个完整文件，生成尾文件补足
+                    yield _tail_job(level, width, remaining, seed)
+                    return
+                remaining -= file_size
+                yield FileJob(level, width, height, file_size, seed)
+
+
+class Manifest:
+    """
+    追加写入的文件清单，每行格式为：事件\t种子\t大小\t相对路径。
+
+    事件：B 开始写入，C 写入完成，T 已截断（大小更新为新值），D 已删除。
+    每条记录用一次 os.write 追加到以 O_APPEND 打开的文件，单行远小于 PIPE_BUF，
+    多个线程、进程各自持有文件描述符同时追加也不会交错。
+    """
+
+    def __init__(self, path, output_dir):
+        """
+        :param path: 清单文件路径
+        :param output_dir: 输出目录，清单中记录相对于该目录的路径
+        """
+        self.path = path
+        self._prefix = os.path.join(output_dir, "")
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+
+    def record(self, event, file_path, size, seed=None):
+        """
+        追加一条记录。
+
+        :param event: 事件，B / C / T / D
+        :param file_path: 文件完整路径
+        :param size: 文件大小
+        :param seed: 文件种子，None 记为 -
+        """
+        if file_path.startswith(self._prefix):
+            file_path = file_path[len(self._prefix):]
+        line = f"{event}\t{'-' if seed is None else seed}\t{size}\t{file_path}\n"
+        os.write(self._fd, line.encode("utf-8"))
+
+    def close(self):
+        os.close(self._fd)
+
+
+def read_manifest(path):
+    """
+    读取清单，按每个文件的最后一条记录得出其当前状态。
+
+    :param path: 清单文件路径
+    :return: {相对路径: [事件, 种子, 大小]}，按写入顺序排列，已删除的文件不包含在内；
+             事件为 B 表示文件没有写完，种子为 None 表示未记录
+    """
+    entries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event, seed, size, relative_path = line.rstrip("\n").split("\t", 3)
+                size = int(size)
+            except ValueError:
+                # 中断时可能留下不完整的最后一行
+                continue
+            if event == "D":
+                entries.pop(relative_path, None)
+            elif event == "T":
+                if relative_path in entries:
+                    entries[relative_path][2] = size
+            else:
+                entries[relative_path] = [event, None if seed == "-" else int(seed), size]
+    return entries
+
+
+def resume_from_manifest(manifest_path, output_dir):
+    """
+    续写前处理清单：删除上次中断时没有写完的文件，并记录删除。
+
+    :return: 已完成文件列表 [(完整路径, 大小)]
+    """
+    completed = []
+    manifest = Manifest(manifest_path, output_dir)
+    try:
+        for relative_path, (event, seed, size) in read_manifest(manifest_path).items():
+            file_path = os.path.join(output_dir, relative_path)
+            if event == "C":
+                completed.append((file_path, size))
+                continue
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+            manifest.record("D", file_path, size)
+    finally:
+        manifest.close()
+    return completed
+
+
+def _reclaim_batch(output_dir, batch):
+    """
+    删除一批文件。
+
+    :param batch: [(相对路径, 大小)]
+    :return: (已删除的 [(相对路径, 大小)], 错误信息列表)
+    """
+    deleted = []
+    errors = []
+    for relative_path, size in batch:
+        try:
+            os.unlink(os.path.join(output_dir, relative_path))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            errors.append(f"删除文件 {relative_path} 时出错: {e}")
+            continue
+        deleted.append((relative_path, size))
+    return deleted, errors
+
+
+def reclaim_files(output_dir, manifest_path=None, workers=None, target_free=None):
+    """
+    按清单并行删除生成的文件，不遍历目录树。
+
+    从最近写入的文件开始，按 RECLAIM_BATCH 个文件一批分给多个线程删除；
+    指定 target_free 时，每完成一批检查一次文件系统空闲比例，达到目标即停止。
+    全部删除后移除清单文件和目录布局中的空子目录。
+
+    :param output_dir: 输出目录
+    :param manifest_path: 清单文件路径，默认为输出目录下的 MANIFEST_NAME
+    :param workers: 删除线程数，默认为 CONFIG["manifest"]["reclaim_workers"]
+    :param target_free: 目标空闲比例（0 ~ 1），None 表示删除全部文件
+    :return: 汇总结果，包含 files（删除文件数）、bytes（删除字节数）、remaining（剩余文件数）、errors
+    """
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_NAME)
+    workers = workers or CONFIG["manifest"]["reclaim_workers"]
+    entries = [(path, entry[2]) for path, entry in read_manifest(manifest_path).items()]
+    entries.reverse()
+    batches = [entries[i:i + RECLAIM_BATCH] for i in range(0, len(entries), RECLAIM_BATCH)]
+    summary = {"files":0, "bytes":0, "remaining":len(entries), "errors":[]}
+
+    def free_ratio():
+        usage = shutil.disk_usage(output_dir)
+        return usage.free / (usage.used + usage.free)
+
+    manifest = Manifest(manifest_path, output_dir)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            batch_iter = iter(batches)
+            while True:
+                reached = target_free is not None and free_ratio() >= target_free
+                # 保持 workers 个删除任务在途
+                while not reached and len(pending) < workers:
+                    batch = next(batch_iter, None)
+                    if batch is None:
+                        break
+                    pending.add(pool.submit(_reclaim_batch, output_dir, batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    deleted, errors = future.result()
+                    for relative_path, size in deleted:
+                        manifest.record("D", relative_path, size)
+                    summary["files"] += len(deleted)
+                    summary["bytes"] += sum(size for _, size in deleted)
+                    summary["errors"].extend(errors)
+    finally:
+        manifest.close()
+    summary["remaining"] = len(entries) - summary["files"]
+    if summary["remaining"] == 0:
+        os.unlink(manifest_path)
+        for sub_dir in sorted(_layout_dirs(CONFIG["layout"]), reverse=True):
+            # 逐层移除空的子目录，非空或不存在时忽略
+            parts = sub_dir.split(os.sep)
+            for depth in range(len(parts), 0, -1):
+                try:
+                    os.rmdir(os.path.join(output_dir, *parts[:depth]))
+                except OSError:
+                    break
+    return summary
+
+
+def _verify_batch(output_dir, batch, payload_config, read_size):
+    """
+    校验一批文件：按文件种子重新生成数据，与读到的文件内容逐块比较。
+
+    :param batch: [(相对路径, 大小, 种子)]，大小为 None 时以实际文件大小为准
+    :param payload_config: 生成文件时使用的负载数据配置
+    :param read_size: 每次读取的字节数
+    :return: (校验通过的文件数, 读取字节数, 错误信息列表)
+    """
+    payload = make_payload_generator(read_size, payload_config=payload_config)
+    files = total = 0
+    errors = []
+    for relative_path, size, seed in batch:
+        offset = 0
+        try:
+            with open(os.path.join(output_dir, relative_path), "rb", buffering=0) as f:
+                actual_size = os.fstat(f.fileno()).st_size
+                if size is not None and actual_size != size:
+                    errors.append(f"文件 {relative_path} 大小不一致: 期望 {size} 字节，实际 {actual_size} 字节")
+                    continue
+                payload.reset(seed)
+                while offset < actual_size:
+                    data = f.read(min(read_size, actual_size - offset))
+                    if not data:
+                        errors.append(f"文件 {relative_path} 读取提前结束于偏移 {offset}")
+                        break
+                    expected = payload.next_chunk(len(data)).tobytes()
+                    if data != expected:
+                        position = next(i for i in range(len(data)) if data[i] != expected[i])
+                        errors.append(f"文件 {relative_path} 内容不一致，起始偏移 {offset + position}")
+                        break
+                    offset += len(data)
+                else:
+                    files += 1
+        except OSError as e:
+            errors.append(f"读取文件 {relative_path} 时出错: {e}")
+        total += offset
+    return files, total, errors
+
+
+def verify_files(output_dir, manifest_path=None, workers=None):
+    """
+    按文件种子重新生成预期数据，并行流式读取生成的文件并逐块比较，同时统计读取吞吐。
+
+    文件种子优先从清单中读取，清单不存在时遍历输出目录，按文件名模板从文件名中解析 seed 变量。
+    校验时 CONFIG["payload"] 中的 mode 与 compress_ratio 需与生成时一致。
+    CONFIG["executor"] 为 thread 时用线程池校验，否则用进程池，数据生成可按 CPU 核数扩展。
+    刚写完的文件可能仍在页缓存中，测量磁盘读取吞吐前应先清空页缓存。
+
+    :param output_dir: 输出目录
+    :param manifest_path: 清单文件路径，默认为输出目录下的 MANIFEST_NAME
+    :param workers: 并行校验数，默认为 CONFIG["verify"]["workers"]
+    :return: 汇总结果，包含 files（校验通过的文件数）、bytes（读取字节数）、skipped（无法校验的文件数）、
+             errors、duration_s 和 throughput_mb_s（读取吞吐）
+    """
+    payload_config = CONFIG["payload"]
+    if payload_config["mode"] == "urandom":
+        raise ValueError("urandom 模式的数据不可复现，无法校验")
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_NAME)
+    workers = workers or CONFIG["verify"]["workers"]
+    read_size = CONFIG["verify"]["read_size"]
+    entries = []
+    skipped = 0
+    if os.path.exists(manifest_path):
+        for relative_path, (event, seed, size) in read_manifest(manifest_path).items():
+            if event == "B" or seed is None:
+                skipped += 1
+                continue
+            entries.append((relative_path, size, seed))
+    else:
+        namer = FileNamer(output_dir)
+        if not namer.has_field("seed"):
+            raise ValueError("清单不存在，文件名模板中也没有 seed 变量，无法取得文件种子")
+        for root, _, names in os.walk(output_dir):
+            for name in names:
+                values = namer.parse(name)
+                if values is None or not isinstance(values["seed"], int):
+                    continue
+                entries.append((os.path.relpath(os.path.join(root, name), output_dir), None, values["seed"]))
+    batches = [entries[i:i + VERIFY_BATCH] for i in range(0, len(entries), VERIFY_BATCH)]
+    summary = {"files":0, "bytes":0, "skipped":skipped, "errors":[]}
+    pool_class = ThreadPoolExecutor if CONFIG["executor"] == "thread" else ProcessPoolExecutor
+    start = time.monotonic()
+    with pool_class(max_workers=workers) as pool:
+        futures = [pool.submit(_verify_batch, output_dir, batch, payload_config, read_size) for batch in batches]
+        for future in futures:
+            files, total, errors = future.result()
+            summary["files"] += files
+            summary["bytes"] += total
+            summary["errors"].extend(errors)
+    summary["duration_s"] = round(time.monotonic() - start, 3)
+    summary["throughput_mb_s"] = round(summary["bytes"] / MB / max(summary["duration_s"], 1e-9), 1)
+    return summary
+
+
+class FileLedger:
+    """
+    本次运行写入的文件账本，以及已派发但尚未完成的在途任务体积。
+
+    目标占用率模式据此计算剩余工作量，并在占用超出目标时删除或截断最近写入的文件，
+    不需要重新扫描输出目录。派发（任务投递线程）与完成（主线程）在不同线程中更新，需要加锁。
+    """
+
+    def __init__(self, manifest=None):
+        """
+        :param manifest: Manifest，删除或截断文件时追加记录，None 表示不记录
+        """
+        self.inflight = 0
+        self._files = deque()
+        self._lock = threading.Lock()
+        self._manifest = manifest
+
+    def preload(self, files):
+        """载入续写前已完成的文件 [(完整路径, 大小)]"""
+        with self._lock:
+            self._files.extend([file_path, size] for file_path, size in files)
+
+    def issue(self, size):
+        """记录派发了一个 size 字节的文件任务"""
+        with self._lock:
+            self.inflight += size
+
+    def complete(self, file_path, size, ok):
+        """记录一个文件任务完成，ok 为 False 表示写入失败"""
+        with self._lock:
+            self.inflight -= size
+            if ok:
+                self._files.append([file_path, size])
+
+    def trim(self, excess):
+        """
+        从最近写入的文件开始删除，最后一个文件按需截断，释放约 excess 字节。
+
+        :return: 实际释放的字节数
+        """
+        freed = 0
+        while freed < excess:
+            with self._lock:
+                if not self._files:
+                    break
+                entry = self._files.pop()
+            file_path, size = entry
+            try:
+                if size <= excess - freed:
+                    os.unlink(file_path)
+                    freed += size
+                    if self._manifest is not None:
+                        self._manifest.record("D", file_path, size)
+                else:
+                    keep = size - (excess - freed)
+                    os.truncate(file_path, keep)
+                    freed += size - keep
+                    entry[1] = keep
+                    with self._lock:
+                        self._files.append(entry)
+                    if self._manifest is not None:
+                        self._manifest.record("T", file_path, keep)
+            except OSError as e:
+                print(f"清理文件 {file_path} 时出错: {e}")
+        return freed
+
+
+def plan_occupancy_jobs(output_dir, ledger, finish_event):
+    """
+    目标占用率模式下的任务规划：根据文件系统使用情况持续生成文件任务，直到达到目标占用率。
+
+    :param output_dir: 输出目录，用于读取所在文件系统的使用情况
+    :param ledger: FileLedger
+    :param finish_event: 设置后停止规划
+    :return: FileJob 生成器
+    """
+    config = CONFIG["occupancy"]
+    jobs = plan_file_jobs()
+    reached_at = None
+    while not finish_event.is_set():
+        usage = shutil.disk_usage(output_dir)
+        capacity = usage.used + usage.free
+        # 距离目标还需写入的字节数（负数表示超出目标），不含在途任务
+        remaining = int(capacity * config["target"]) - usage.used
+        tolerance = int(capacity * config["tolerance"])
+        if remaining < -tolerance:
+            # 其他程序占用增加导致超出目标，等在途任务完成后清理本次写入的文件
+            if ledger.inflight == 0:
+                freed = ledger.trim(-remaining)
+                print(f"【{time.strftime('%H:%M:%S')}】占用率超出目标，已清理 {freed / MB:.1f}MB")
+            finish_event.wait(config["poll_interval"])
+            continue
+        if remaining <= tolerance:
+            if ledger.inflight:
+                finish_event.wait(0.05)
+                continue
+            if reached_at is None:
+                reached_at = time.time()
+                print(f"【{time.strftime('%H:%M:%S')}】已达到目标占用率 {usage.used / capacity * 100:.2f}%")
+                if not config["hold"]:
+                    return
+            if config["hold_seconds"] is not None and time.time() - reached_at >= config["hold_seconds"]:
+                return
+            finish_event.wait(config["poll_interval"])
+            continue
+        job = next(jobs)
+        if remaining > capacity * config["slowdown_band"]:
+            # 距离目标较远，按正常大小派发，在途任务不超过剩余量
+            size = min(job.size, remaining - ledger.inflight)
         else:
-            # 非 0 级文件生成数量为当前级别数加上 0 到当前级别数的随机数
-            count = level + random.randint(0, level)
-        for _ in range(count):
-            # 随机生成文件的宽度和高度
-            width = random.randint(width_min, width_max)
-            height = random.randint(height_min, height_max)
-            # 计算当前文件的大小
-            file_size = width * height
-            # 如果生成当前文件会超过线程体积上限，则停止生成
-            if total_volume + file_size > volume_per_thread:
+            # 进入减速区间，在途任务不超过剩余量的一半，逐步逼近目标
+            size = min(job.size, remaining // 2 - ledger.inflight)
+        if size <= 0:
+            finish_event.wait(0.05)
+            continue
+        ledger.issue(size)
+        yield job if size == job.size else _tail_job(job.level, job.width, size, job.seed)
+
+
+class WorkerStats:
+    """
+    单个工作线程的吞吐与延迟统计。
+
+    计数与直方图只在所属线程内更新，无需加锁；每次记录耗时时顺带检查是否到了发布时间，
+    到时通过 publish 回调发布一次累计快照，不需要额外的计时线程。
+    """
+
+    def __init__(self, publish=None, interval=1.0):
+        """
+        :param publish: 发布快照的回调，参数为 snapshot() 的返回值，None 表示不发布
+        :param interval: 发布间隔，单位为秒
+        """
+        self.bytes = 0
+        self.files = 0
+        # 每个操作的统计：[次数, 总耗时, 最大耗时, 直方图]，耗时单位为纳秒
+        self.ops = {op:[0, 0, 0, [0] * HISTOGRAM_BUCKETS] for op in STAT_OPS}
+        self._publish = publish
+        self._interval_ns = int(interval * 1e9)
+        self._next_publish = time.perf_counter_ns() + self._interval_ns
+
+    def record(self, op, start_ns, size=0):
+        """
+        记录一次操作的耗时。
+
+        :param op: 操作名，取值见 STAT_OPS
+        :param start_ns: 操作开始时的 time.perf_counter_ns()
+        :param size: 本次操作写入的字节数
+        :return: 当前的 time.perf_counter_ns()，可直接作为下一个操作的开始时间
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - start_ns
+        entry = self.ops[op]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        entry[3][elapsed.bit_length()] += 1
+        self.bytes += size
+        if self._publish is not None and now >= self._next_publish:
+            self._next_publish = now + self._interval_ns
+            self._publish(self.snapshot())
+        return now
+
+    def snapshot(self):
+        """返回可序列化的累计统计快照"""
+        return {
+            "bytes":self.bytes,
+            "files":self.files,
+            "ops":{
+                op:{"count":count, "total_ns":total, "max_ns":peak, "buckets":list(buckets)}
+                for op, (count, total, peak, buckets) in self.ops.items()
+            },
+        }
+
+
+def merge_snapshots(snapshots):
+    """
+    合并多个统计快照。
+
+    :param snapshots: WorkerStats.snapshot() 返回值的可迭代对象
+    """
+    merged = WorkerStats().snapshot()
+    for snapshot in snapshots:
+        merged["bytes"] += snapshot["bytes"]
+        merged["files"] += snapshot["files"]
+        for op, entry in snapshot["ops"].items():
+            target = merged["ops"][op]
+            target["count"] += entry["count"]
+            target["total_ns"] += entry["total_ns"]
+            target["max_ns"] = max(target["max_ns"], entry["max_ns"])
+            target["buckets"] = [a + b for a, b in zip(target["buckets"], entry["buckets"])]
+    return merged
+
+
+def summarize_latency(entry):
+    """
+    由单个操作的统计计算耗时概况，分位数取所在直方图桶的上界（不超过最大耗时），单位为微秒。
+
+    :param entry: 快照中 ops 的某一项
+    """
+    count = entry["count"]
+    summary = {
+        "count":count,
+        "total_s":round(entry["total_ns"] / 1e9, 3),
+        "mean_us":round(entry["total_ns"] / count / 1e3, 1) if count else 0,
+        "max_us":round(entry["max_ns"] / 1e3, 1),
+    }
+    for name, quantile in (("p50_us", 0.5), ("p90_us", 0.9), ("p99_us", 0.99)):
+        value = 0
+        seen = 0
+        for index, bucket in enumerate(entry["buckets"]):
+            seen += bucket
+            if count and seen >= count * quantile:
+                value = min(1 << index, entry["max_ns"]) / 1e3
                 break
-            # 生成唯一的文件 ID
-            file_id = uuid4().hex
-            timestamp = int(time.time() * 1000)
-            # 拼接文件名
-            filename = FILE_NAME % {
-                "level":level, "file_id":file_id,
-                "width":width, "height":height,
-                "timestamp":timestamp,
-            }
-            # 拼接文件完整路径
-            file_path = os.path.join(output_dir, filename)
-            try:
-                # 生成随机数据并写入文件，分 height 次写入，每次写入 width 个字节
-                with open(file_path, 'wb') as f:
-                    for _ in range(height):
-                        chunk = bytes([random.randint(0, 255) for _ in range(width)])
-                        f.write(chunk)
-                # 更新已生成文件的总体积
-                total_volume += file_size
-            except IOError as e:
-                print(f"写入文件 {file_path} 时出错: {e}")
+        summary[name] = round(value, 1)
+    return summary
 
 
-def write_data_to_files(total_volume_limit=1024*1024*1024, output_dir='.'): 
+class ProgressMonitor:
+    """
+    主进程汇总各工作线程的统计快照，定期输出控制台进度行，并生成最终报告。
     """
-    多线程生成随机文件，确保生成文件的总体积不超过指定上限。
 
-    :param total_volume_limit: 生成文件的总体积上限，单位为字节，默认为 1GB
-    :param output_dir: 输出目录，默认为当前工作目录
+    def __init__(self, interval):
+        """
+        :param interval: 进度行输出间隔，单位为秒，0 表示不输出
+        """
+        self.interval = interval
+        self.snapshots = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._last_time = self._start
+        self._last_bytes = 0
+        self._last_files = 0
+
+    def update(self, worker_id, snapshot):
+        """更新某个工作线程的最新快照"""
+        self.snapshots[worker_id] = snapshot
+
+    def tick(self):
+        """到达输出间隔时输出一行进度"""
+        now = time.perf_counter()
+        if not self.interval or now - self._last_time < self.interval:
+            return
+        merged = merge_snapshots(self.snapshots.values())
+        elapsed = now - self._last_time
+        rate = (merged["bytes"] - self._last_bytes) / elapsed / MB
+        files_rate = (merged["files"] - self._last_files) / elapsed
+        ops = merged["ops"]
+        busy = ops["generate"]["total_ns"] + ops["write"]["total_ns"]
+        generate_share = ops["generate"]["total_ns"] / busy * 100 if busy else 0
+        write_p99 = summarize_latency(ops["write"])["p99_us"]
+        open_p99 = summarize_latency(ops["open"])["p99_us"]
+        print(
+            f"【{time.strftime('%H:%M:%S')}】已写入 {merged['bytes'] / MB:.1f}MB "
+            f"{merged['files']} 个文件 | {rate:.1f}MB/s {files_rate:.1f} 文件/s | "
+            f"生成耗时占比 {generate_share:.0f}% | write p99 {write_p99:.0f}us open p99 {open_p99:.0f}us"
+        )
+        self._last_time = now
+        self._last_bytes = merged["bytes"]
+        self._last_files = merged["files"]
+
+    def report(self):
+        """生成最终报告"""
+        duration = time.perf_counter() - self._start
+        merged = merge_snapshots(self.snapshots.values())
+        return {
+            "started_at":time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "duration_s":round(duration, 3),
+            "bytes":merged["bytes"],
+            "files":merged["files"],
+            "throughput_mb_s":round(merged["bytes"] / duration / MB, 2) if duration else 0,
+            "files_per_s":round(merged["files"] / duration, 2) if duration else 0,
+            "latency":{op:summarize_latency(entry) for op, entry in merged["ops"].items()},
+            "histogram_ns":{op:entry["buckets"] for op, entry in merged["ops"].items()},
+            "workers":{
+                worker_id:{
+                    "bytes":snapshot["bytes"],
+                    "files":snapshot["files"],
+                    "latency":{op:summarize_latency(entry) for op, entry in snapshot["ops"].items()},
+                }
+                for worker_id, snapshot in sorted(self.snapshots.items())
+            },
+        }
+
+
+def check_rate_profile(profile):
+    """
+    检查限速曲线配置，不合法时抛出 ValueError。
+
+    :param profile: 限速曲线配置，即 CONFIG["rate"]["profile"]
+    """
+    shape = profile["shape"]
+    if shape not in ("constant", "ramp", "sine", "step"):
+        raise ValueError(f"不支持的限速曲线: {shape}，可选值: constant, ramp, sine, step")
+    if shape in ("ramp", "sine") and not profile.get("period", 0) > 0:
+        raise ValueError(f"{shape} 限速曲线的 period 必须大于 0: {profile.get('period')}")
+    if shape == "step":
+        steps = profile.get("steps") or []
+        if not steps:
+            raise ValueError("step 限速曲线的 steps 不能为空")
+        for duration, _ in steps:
+            if duration <= 0:
+                raise ValueError(f"step 限速曲线每一段的时长必须大于 0: {duration}")
+
+
+def rate_factor(profile, elapsed):
+    """
+    计算限速曲线在 elapsed 秒时的系数。
+
+    :param profile: 限速曲线配置，即 CONFIG["rate"]["profile"]
+    :param elapsed: 距离开始写入的秒数
+    """
+    shape = profile["shape"]
+    low, high = profile["min"], profile["max"]
+    if shape == "constant":
+        return 1.0
+    if shape == "ramp":
+        return low + (high - low) * min(elapsed / profile["period"], 1.0)
+    if shape == "sine":
+        return low + (high - low) * (1 + math.sin(2 * math.pi * elapsed / profile["period"])) / 2
+    if shape == "step":
+        cycle = sum(duration for duration, _ in profile["steps"])
+        offset = elapsed % cycle
+        for duration, factor in profile["steps"]:
+            if offset < duration:
+                return factor
+            offset -= duration
+        return profile["steps"][-1][1]
+    raise ValueError(f"不支持的限速曲线: {shape}，可选值: constant, ramp, sine, step")
+
+
+class TokenBucket:
+    """
+    令牌桶。
+
+    shared 为 True 时令牌数与上次补充时间放在共享内存中，并使用进程锁，可在多个进程的线程间共同限速；
+    令牌允许透支：桶内令牌不少于本次需求（或已满）即可取走，余额可为负，后续请求等待补足，
+    这样单次需求超过桶容量时也不会永远等待。
+    """
+
+    def __init__(self, rate, capacity, profile, start, shared=False):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶容量
+        :param profile: 限速曲线配置
+        :param start: 开始写入的 time.monotonic()，限速曲线以此为起点
+        :param shared: 是否跨进程共享
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.profile = profile
+        self.start = start
+        if shared:
+            self._state = multiprocessing.RawArray("d", [capacity, start])
+            self._lock = multiprocessing.Lock()
+        else:
+            self._state = [capacity, start]
+            self._lock = threading.Lock()
+
+    def acquire(self, amount):
+        """取走 amount 个令牌，令牌不足时阻塞等待"""
+        state = self._state
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                rate = self.rate * rate_factor(self.profile, now - self.start)
+                state[0] = min(self.capacity, state[0] + (now - state[1]) * rate)
+                state[1] = now
+                if state[0] >= min(amount, self.capacity):
+                    state[0] -= amount
+                    return
+                wait = (min(amount, self.capacity) - state[0]) / rate if rate > 0 else 0.1
+            time.sleep(min(wait, 0.1))
+
+
+def make_rate_buckets(rate_config, start):
+    """
+    创建全局共享的令牌桶，没有配置全局限速时对应项为 None。
+
+    :param rate_config: 限速配置，即 CONFIG["rate"]
+    :param start: 开始写入的 time.monotonic()
+    :return: {"bytes": TokenBucket, "files": TokenBucket, "start": start}
+    """
+    check_rate_profile(rate_config["profile"])
+    buckets = {"bytes":None, "files":None, "start":start}
+    if rate_config["bytes_per_sec"]:
+        buckets["bytes"] = TokenBucket(
+            rate_config["bytes_per_sec"], rate_config["burst_bytes"] or rate_config["bytes_per_sec"],
+            rate_config["profile"], start, shared=True
+        )
+    if rate_config["files_per_sec"]:
+        buckets["files"] = TokenBucket(
+            rate_config["files_per_sec"], rate_config["burst_files"] or rate_config["files_per_sec"],
+            rate_config["profile"], start, shared=True
+        )
+    return buckets
+
+
+class RateShaper:
+    """
+    单个工作线程的限速器，组合本线程的字节令牌桶与全局共享的字节、文件令牌桶。
+    """
+
+    def __init__(self, buckets, rate_config=None):
+        """
+        :param buckets: make_rate_buckets 的返回值
+        :param rate_config: 限速配置，默认为 CONFIG["rate"]
+        """
+        rate_config = rate_config or CONFIG["rate"]
+        self._bytes = [bucket for bucket in (buckets["bytes"],) if bucket is not None]
+        self._files = buckets["files"]
+        worker_rate = rate_config["worker_bytes_per_sec"]
+        if worker_rate:
+            self._bytes.insert(0, TokenBucket(
+                worker_rate, rate_config["burst_bytes"] or worker_rate,
+                rate_config["profile"], buckets["start"]
+            ))
+
+    @staticmethod
+    def enabled(rate_config):
+        """是否配置了任意一项限速"""
+        return bool(
+            rate_config["bytes_per_sec"] or rate_config["worker_bytes_per_sec"] or rate_config["files_per_sec"]
+        )
+
+    def throttle(self, size, stats, started):
+        """
+        写入 size 字节前等待字节令牌，等待时间计入 throttle。
+
+        :return: 当前的 time.perf_counter_ns()，作为下一个操作的开始时间
+        """
+        for bucket in self._bytes:
+            bucket.acquire(size)
+        return stats.record("throttle", started)
+
+    def throttle_file(self, stats):
+        """创建文件前等待文件令牌"""
+        if self._files is not None:
+            started = time.perf_counter_ns()
+            self._files.acquire(1)
+            stats.record("throttle", started)
+
+
+def check_write_config(write_config):
+    """
+    检查写入策略配置在当前平台是否可用，不可用时抛出 ValueError。
+
+    :param write_config: 写入策略配置，即 CONFIG["write"]
+    """
+    strategy = write_config["strategy"]
+    write_size = write_config.get("write_size")
+    if strategy not in WRITE_STRATEGIES:
+        raise ValueError(f"不支持的写入策略: {strategy}，可选值: {', '.join(WRITE_STRATEGIES)}")
+    if write_config["sync"] not in SYNC_POLICIES:
+        raise ValueError(f"不支持的刷盘策略: {write_config['sync']}，可选值: {', '.join(SYNC_POLICIES)}")
+    if write_size is not None and write_size <= 0:
+        raise ValueError(f"write_size 必须大于 0: {write_size}")
+    if strategy in ("preallocate", "allocate") and not hasattr(os, "posix_fallocate"):
+        raise ValueError(f"当前平台不支持 posix_fallocate，无法使用 {strategy} 写入策略")
+    if strategy == "writev" and not hasattr(os, "writev"):
+        raise ValueError("当前平台不支持 os.writev，无法使用 writev 写入策略")
+    if strategy == "writev" and write_config.get("writev_batch", 0) < 1:
+        raise ValueError(f"writev_batch 必须大于等于 1: {write_config.get('writev_batch')}")
+    if strategy == "direct":
+        if not hasattr(os, "O_DIRECT") or fcntl is None:
+            raise ValueError("当前平台不支持 O_DIRECT，无法使用 direct 写入策略")
+        if write_size is None or write_size % DIRECT_ALIGN:
+            raise ValueError(f"direct 写入策略要求 write_size 为 {DIRECT_ALIGN} 的整数倍: {write_size}")
+
+
+def _write_all(fd, view):
+    """把 view 全部写入 fd，处理部分写入的情况"""
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _write_sequential(fd, file_size, chunk_size, payload, sync_func, sync_interval, stats, shaper, direct=False):
+    """
+    逐块调用 os.write 写入数据（buffered / preallocate / direct 策略）。
+
+    :param sync_func: interval 刷盘策略下的刷盘函数，None 表示不按间隔刷盘
+    :param stats: WorkerStats
+    :param shaper: RateShaper，None 表示不限速
+    :param direct: fd 是否以 O_DIRECT 打开
+    """
+    if direct:
+        # O_DIRECT 只能写入对齐的部分，末尾不足 DIRECT_ALIGN 的部分关闭 O_DIRECT 后写入
+        direct_size = file_size - file_size % DIRECT_ALIGN
+    else:
+        direct_size = file_size
+    written = 0
+    unsynced = 0
+    started = time.perf_counter_ns()
+    while written < file_size:
+        if written == direct_size:
+            fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_DIRECT)
+            size = file_size - written
+        else:
+            size = min(chunk_size, direct_size - written)
+        if shaper is not None:
+            started = shaper.throttle(size, stats, started)
+        chunk = payload.next_chunk(size)
+        started = stats.record("generate", started)
+        _write_all(fd, chunk)
+        started = stats.record("write", started, size)
+        written += size
+        unsynced += size
+        if sync_func is not None and unsynced >= sync_interval:
+            sync_func(fd)
+            started = stats.record("fsync", started)
+            unsynced = 0
+
+
+def _write_vectored(fd, file_size, chunk_size, payload, sync_func, sync_interval, stats, shaper, batch):
+    """
+    每次生成 batch 个数据块，用一次 os.writev 提交（writev 策略）。
+    """
+    written = 0
+    unsynced = 0
+    started = time.perf_counter_ns()
+    while written < file_size:
+        remaining = file_size - written
+        sizes = [chunk_size] * min(batch, remaining // chunk_size)
+        if len(sizes) < batch and remaining % chunk_size:
+            sizes.append(remaining % chunk_size)
+        total = sum(sizes)
+        if shaper is not None:
+            started = shaper.throttle(total, stats, started)
+        views = payload.next_chunks(sizes)
+        started = stats.record("generate", started)
+        done = os.writev(fd, views)
+        # 普通文件极少出现部分写入，出现时逐块补写剩余部分
+        for view in views:
+            if done >= len(view):
+                done -= len(view)
+                continue
+            _write_all(fd, view[done:])
+            done = 0
+        started = stats.record("write", started, total)
+        written += total
+        unsynced += total
+        if sync_func is not None and unsynced >= sync_interval:
+            sync_func(fd)
+            started = stats.record("fsync", started)
+            unsynced = 0
+
+
+def _write_mapped(fd, file_size, chunk_size, payload, sync_interval, interval_sync, stats, shaper):
+    """
+    预设文件大小后映射整个文件，把负载数据直接生成到映射区域中（mmap 策略）。
+    数据生成与写入在同一步完成，耗时统一计入 generate。
+
+    :param interval_sync: 是否每写入 sync_interval 字节执行一次 msync
+    """
+    started = time.perf_counter_ns()
+    os.ftruncate(fd, file_size)
+    started = stats.record("allocate", started)
+    if file_size == 0:
+        return
+    mapped = mmap.mmap(fd, file_size)
+    try:
+        view = memoryview(mapped)
+        try:
+            unsynced = 0
+            for offset in range(0, file_size, chunk_size):
+                size = min(chunk_size, file_size - offset)
+                if shaper is not None:
+                    started = shaper.throttle(size, stats, started)
+                payload.fill_into(view[offset:offset + size])
+                started = stats.record("generate", started, size)
+                unsynced += size
+                if interval_sync and unsynced >= sync_interval:
+                    mapped.flush()
+                    started = stats.record("fsync", started)
+                    unsynced = 0
+        finally:
+            view.release()
+        mapped.flush()
+        stats.record("fsync", started)
+    finally:
+        mapped.close()
+
+
+def write_tile(file_path, file_size, chunk_size, payload, write_config, stats=None, shaper=None):
+    """
+    按写入策略生成一个文件。
+
+    :param file_path: 文件路径
+    :param file_size: 文件大小，单位为字节
+    :param chunk_size: 每次写入的字节数
+    :param payload: 负载数据生成器
+    :param write_config: 写入策略配置，即 CONFIG["write"]
+    :param stats: WorkerStats，None 表示不统计
+    :param shaper: RateShaper，None 表示不限速
+    """
+    stats = stats or WorkerStats()
+    strategy = write_config["strategy"]
+    sync = write_config["sync"]
+    sync_interval = write_config["sync_interval"]
+    if write_config["sync_method"] == "fdatasync" and hasattr(os, "fdatasync"):
+        sync_func = os.fdatasync
+    else:
+        sync_func = os.fsync
+    interval_sync_func = sync_func if sync == "interval" else None
+    flags = os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    # mmap 映射文件要求以读写方式打开
+    flags |= os.O_RDWR if strategy == "mmap" else os.O_WRONLY
+    if strategy == "direct":
+        flags |= os.O_DIRECT
+    started = time.perf_counter_ns()
+    fd = os.open(file_path, flags, 0o644)
+    stats.record("open", started)
+    try:
+        if strategy in ("preallocate", "allocate"):
+            started = time.perf_counter_ns()
+            os.posix_fallocate(fd, 0, file_size)
+            stats.record("allocate", started, file_size if strategy == "allocate" else 0)
+        if strategy == "allocate":
+            # 只分配区段，不写入数据
+            pass
+        elif payload.sparse:
+            # 稀疏模式只设置文件大小，不写入数据
+            started = time.perf_counter_ns()
+            os.ftruncate(fd, file_size)
+            stats.record("allocate", started, file_size)
+        elif strategy == "mmap":
+            _write_mapped(fd, file_size, chunk_size, payload, sync_interval, sync == "interval", stats, shaper)
+        elif strategy == "writev":
+            _write_vectored(
+                fd, file_size, chunk_size, payload,
+                interval_sync_func, sync_interval, stats, shaper, write_config["writev_batch"]
+            )
+        else:
+            _write_sequential(
+                fd, file_size, chunk_size, payload,
+                interval_sync_func, sync_interval, stats, shaper, direct=strategy == "direct"
+            )
+        if sync != "none":
+            started = time.perf_counter_ns()
+            sync_func(fd)
+            stats.record("fsync", started)
+    finally:
+        started = time.perf_counter_ns()
+        os.close(fd)
+        stats.record("close", started)
+
+
+def _layout_dirs(layout_config):
+    """
+    列出目录布局中的所有子目录（相对路径），flat 布局返回空列表。
+
+    :param layout_config: 目录布局配置，即 CONFIG["layout"]
+    """
+    mode = layout_config["mode"]
+    if mode == "flat":
+        return []
+    if mode == "level":
+        return [f"L{level}" for level in range(5)]
+    if mode == "hash":
+        fanout = layout_config["fanout"]
+        if not 1 <= fanout <= 65536 or layout_config["depth"] < 1 or fanout ** layout_config["depth"] > 1 << 32:
+            raise ValueError(f"hash 布局的 fanout/depth 超出范围: {fanout}/{layout_config['depth']}")
+        width = len(f"{fanout - 1:x}")
+        names = [f"{i:0{width}x}" for i in range(fanout)]
+        return [os.path.join(*parts) for parts in itertools.product(names, repeat=layout_config["depth"])]
+    raise ValueError(f"不支持的目录布局: {mode}，可选值: flat, hash, level")
+
+
+def prepare_layout(output_dir, layout_config):
+    """
+    在开始写入前一次性创建目录布局中的所有子目录。
+
+    :param output_dir: 输出目录
+    :param layout_config: 目录布局配置，即 CONFIG["layout"]
     """
-    # 确保输出目录存在
-    thread_count = CONFIG["thread_count"]
     os.makedirs(output_dir, exist_ok=True)
-    # 计算每个线程需要生成的文件体积
-    volume_per_thread = total_volume_limit // thread_count
-    # 存储所有线程对象
+    for sub_dir in _layout_dirs(layout_config):
+        os.makedirs(os.path.join(output_dir, sub_dir), exist_ok=True)
+
+
+class FileNamer:
+    """
+    预编译的文件名模板与目录布局。
+
+    构造时把 %(name)X 形式的模板改写为按位置格式化的模板，并记录用到的变量，
+    每个文件只需一次元组取值和一次格式化。
+    同时生成解析文件名的正则表达式，供校验时从文件名中取回种子。
+    file_id 由线程随机前缀加自增计数组成，保证跨线程、跨进程唯一。
+    """
+
+    def __init__(self, output_dir, template=None, layout_config=None):
+        """
+        :param output_dir: 输出目录
+        :param template: 文件名模板，默认为 FILE_NAME
+        :param layout_config: 目录布局配置，默认为 CONFIG["layout"]
+        """
+        template = FILE_NAME if template is None else template
+        layout_config = layout_config or CONFIG["layout"]
+        fields = []
+        pattern = []
+        position = 0
+        self._bases = {}
+        # 同时生成按位置格式化的模板和用于解析文件名的正则表达式
+        for match in re.finditer(r"%%|%\((\w+)\)([#0\- +]*\d*(?:\.\d+)?[a-zA-Z])?", template):
+            pattern.append(re.escape(template[position:match.start()]))
+            position = match.end()
+            name, spec = match.groups()
+            if name is None:
+                pattern.append("%")
+                continue
+            fields.append(name)
+            regex, base = FILE_NAME_CONVERSIONS.get((spec or "s")[-1], (r".+?", 10))
+            if name in self._bases:
+                pattern.append(f"(?P={name})")
+            else:
+                pattern.append(f"(?P<{name}>{regex})")
+                self._bases[name] = base
+        pattern.append(re.escape(template[position:]))
+        self._pattern = re.compile("".join(pattern))
+        self._format = re.sub(r"%%|%\((\w+)\)", lambda match: "%%" if match.group(1) is None else "%", template)
+        unknown = set(fields) - set(FILE_NAME_FIELDS)
+        if unknown:
+            raise ValueError(f"文件名模板中有不支持的变量: {', '.join(sorted(unknown))}")
+        # 按模板中变量出现的顺序从 (level, file_id, width, height, timestamp, seed) 中取值
+        indexes = [FILE_NAME_FIELDS.index(name) for name in fields]
+        if len(indexes) > 1:
+            self._pick = itemgetter(*indexes)
+        elif indexes:
+            self._pick = lambda values, index=indexes[0]: (values[index],)
+        else:
+            self._pick = lambda values: ()
+        self._use_timestamp = "timestamp" in fields
+        self._prefix = uuid4().hex[:16]
+        self._counter = itertools.count()
+        self._mode = layout_config["mode"]
+        self._fanout = layout_config["fanout"]
+        self._depth = layout_config["depth"]
+        self._output_dir = output_dir
+        # 各子目录的完整路径，按哈希值或层级下标取用
+        self._dirs = [os.path.join(output_dir, sub_dir) for sub_dir in _layout_dirs(layout_config)]
+
+    def path(self, level, width, height, seed=0):
+        """
+        生成下一个文件的完整路径。
+
+        :return: (file_id, file_path)
+        """
+        file_id = "%s%016x" % (self._prefix, next(self._counter))
+        timestamp = int(time.time() * 1000) if self._use_timestamp else 0
+        filename = self._format % self._pick((level, file_id, width, height, timestamp, seed))
+        if self._mode == "hash":
+            directory = self._dirs[zlib.crc32(file_id.encode()) % (self._fanout ** self._depth)]
+        elif self._mode == "level":
+            directory = self._dirs[level]
+        else:
+            directory = self._output_dir
+        return file_id, os.path.join(directory, filename)
+
+    def has_field(self, name):
+        """模板中是否用到了变量 name"""
+        return name in self._bases
+
+    def parse(self, filename):
+        """
+        从文件名中解析出模板变量，数值型变量按格式转换符转换为整数。
+
+        :return: {变量名: 值}，文件名与模板不匹配时返回 None
+        """
+        match = self._pattern.fullmatch(filename)
+        if match is None:
+            return None
+        values = match.groupdict()
+        for name, base in self._bases.items():
+            try:
+                values[name] = int(values[name], base)
+            except ValueError:
+                # %s 等字符串转换符：能转换为整数时才转换
+                pass
+        return values
+
+
+def generate_files_in_thread(output_dir, job_queue, worker_id=0, stats=None, on_file=None, shaper=None,
+                             manifest=None):
+    """
+    在单个线程中从任务队列领取文件任务并生成随机文件，直到领取到结束标记 None。
+
+    :param output_dir: 输出文件的目录路径
+    :param job_queue: 文件任务队列，元素为 FileJob，None 表示没有更多任务
+    :param worker_id: 工作线程序号
+    :param stats: WorkerStats，None 表示不对外发布统计
+    :param on_file: 每个文件任务结束后的回调，参数为 (file_path, file_size, ok)
+    :param shaper: RateShaper，None 表示不限速
+    :param manifest: Manifest，None 表示不记录清单
+    :return: 写入结果，包含 bytes（写入字节数）、files（文件数）、errors（错误信息列表）、stats（统计快照）
+    """
+    stats = stats or WorkerStats()
+    write_config = CONFIG["write"]
+    write_size = write_config.get("write_size")
+    # 每个线程持有独立的负载数据生成器，缓冲区按最大写入大小预分配
+    payload = make_payload_generator(write_size or CONFIG["width"]["max"], worker_id)
+    per_file_seed = CONFIG["payload"].get("per_file_seed", False)
+    # 每个线程预编译一次文件名模板
+    namer = FileNamer(output_dir)
+    # 记录当前线程的写入结果
+    result = _new_result()
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        level, width, height, file_size, seed = job
+        # 生成唯一的文件 ID，拼接文件完整路径
+        file_id, file_path = namer.path(level, width, height, seed)
+        if per_file_seed:
+            # 每个文件从自己的种子重新开始数据流，校验时可按种子重新生成
+            payload.reset(seed)
+        # 只有按文件种子生成时，清单中记录的种子才能用于校验
+        file_seed = seed if per_file_seed else None
+        if shaper is not None:
+            shaper.throttle_file(stats)
+        try:
+            if manifest is not None:
+                manifest.record("B", file_path, file_size, file_seed)
+            # 生成随机数据并写入文件，每次写入 write_size 个字节，未设置时每次写入 width 个字节
+            write_tile(file_path, file_size, write_size or width, payload, write_config, stats, shaper)
+            if manifest is not None:
+                manifest.record("C", file_path, file_size, file_seed)
+            result["bytes"] += file_size
+            result["files"] += 1
+            stats.files += 1
+            ok = True
+        except OSError as e:
+            print(f"写入文件 {file_path} 时出错: {e}")
+            result["errors"].append(f"写入文件 {file_path} 时出错: {e}")
+            ok = False
+        if on_file is not None:
+            on_file(file_path, file_size, ok)
+    result["stats"] = stats.snapshot()
+    return result
+
+
+def _new_result():
+    """创建空的写入结果"""
+    return {"bytes":0, "files":0, "errors":[]}
+
+
+def _report_worker(report_queue, output_dir, job_queue, worker_id, rate_buckets, manifest_path):
+    """
+    工作线程入口，执行写入任务并把统计快照与结果放入汇报队列。
+
+    :param report_queue: 汇报队列，元素为 ("stats", worker_id, snapshot)、("file", worker_id, (path, size, ok))
+                         或 ("done", worker_id, result)，目标占用率模式下才汇报 file
+    :param output_dir: 输出目录
+    :param job_queue: 文件任务队列
+    :param worker_id: 工作线程序号
+    :param rate_buckets: make_rate_buckets 的返回值，None 表示不限速
+    :param manifest_path: 清单文件路径，None 表示不记录清单
+    """
+    stats = WorkerStats(
+        publish=lambda snapshot: report_queue.put(("stats", worker_id, snapshot)),
+        interval=CONFIG["report"]["interval"] or 1.0
+    )
+    on_file = None
+    if CONFIG["occupancy"]["enabled"]:
+        on_file = lambda *file_info: report_queue.put(("file", worker_id, file_info))
+    shaper = None if rate_buckets is None else RateShaper(rate_buckets)
+    manifest = None
+    try:
+        if manifest_path is not None:
+            manifest = Manifest(manifest_path, output_dir)
+        result = generate_files_in_thread(output_dir, job_queue, worker_id, stats, on_file, shaper, manifest)
+    except Exception as e:
+        result = _new_result()
+        result["errors"].append(f"工作线程 {worker_id} 异常退出: {e!r}")
+        result["stats"] = stats.snapshot()
+        print(result["errors"][-1])
+    finally:
+        if manifest is not None:
+            manifest.close()
+    report_queue.put(("done", worker_id, result))
+
+
+def _start_threads(report_queue, output_dir, job_queue, worker_ids, rate_buckets, manifest_path):
+    """
+    启动一组工作线程。
+
+    :return: 线程对象列表
+    """
     threads = []
-    for _ in range(thread_count):
+    for worker_id in worker_ids:
         # 创建线程对象，指定目标函数和参数
+        # 守护线程：再次按 Ctrl+C 时主线程直接退出，不等待正在写入的文件
         thread = threading.Thread(
-            target=generate_files_in_thread,
-            args=(output_dir, volume_per_thread)
+            target=_report_worker,
+            args=(report_queue, output_dir, job_queue, worker_id, rate_buckets, manifest_path),
+            daemon=True
         )
         threads.append(thread)
         # 启动线程
         thread.start()
-    # 等待所有线程执行完毕
-    for thread in threads:
+    return threads
+
+
+def _process_main(config, report_queue, output_dir, job_queue, worker_ids, rate_buckets, manifest_path):
+    """
+    工作进程入口，在进程内启动一组工作线程并等待其结束。
+
+    :param config: 主进程的 CONFIG，spawn 方式启动的子进程需要重新载入
+    """
+    # Ctrl+C 由主进程统一处理：停止派发任务，工作线程写完当前文件后领取到结束标记退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    CONFIG.update(config)
+    for thread in _start_threads(report_queue, output_dir, job_queue, worker_ids, rate_buckets, manifest_path):
         thread.join()
 
+
+def _feed_jobs(job_queue, jobs, worker_count, stop_event, finish_event):
+    """
+    任务投递线程：把文件任务依次放入有界任务队列，最后为每个工作线程放入一个结束标记。
+
+    :param jobs: FileJob 可迭代对象
+    :param worker_count: 工作线程数
+    :param stop_event: 设置后立即停止投递（工作线程已全部退出时避免阻塞）
+    :param finish_event: 设置后不再投递新任务，丢弃队列中尚未领取的任务，只投递结束标记
+    """
+    jobs = itertools.takewhile(lambda job: not finish_event.is_set(), jobs)
+    for job in jobs:
+        if not _put_job(job_queue, job, stop_event, finish_event):
+            break
+    if finish_event.is_set():
+        _drain_jobs(job_queue)
+    for _ in range(worker_count):
+        if not _put_job(job_queue, None, stop_event):
+            return
+
+
+def _put_job(job_queue, job, stop_event, finish_event=None):
+    """
+    把一个任务放入有界任务队列，队列满时重试。
+
+    :return: 成功放入返回 True；stop_event（或 finish_event）被设置时放弃并返回 False
+    """
+    while not stop_event.is_set():
+        if finish_event is not None and finish_event.is_set():
+            return False
+        try:
+            job_queue.put(job, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain_jobs(job_queue):
+    """取出任务队列中尚未被领取的任务并丢弃"""
+    while True:
+        try:
+            job_queue.get_nowait()
+        except queue.Empty:
+            return
+
+
+def _abort_workers(handles, job_queue, worker_count):
+    """
+    再次按 Ctrl+C 时立即结束：丢弃尚未领取的任务并为每个工作线程放入结束标记，
+    终止工作进程；线程后端的工作线程为守护线程，随主线程退出。
+    """
+    _drain_jobs(job_queue)
+    for _ in range(worker_count):
+        try:
+            job_queue.put_nowait(None)
+        except queue.Full:
+            break
+    for handle in handles:
+        if isinstance(handle, multiprocessing.Process):
+            handle.terminate()
+
+
+def _plan_worker_groups():
+    """
+    按执行后端规划工作线程的分组，每组对应一个进程。
+
+    :return: (executor, groups)，groups 为各进程内工作线程序号列表
+    """
+    executor = CONFIG.get("executor", "thread")
+    thread_count = CONFIG["thread_count"]
+    process_count = CONFIG.get("process_count") or os.cpu_count() or 1
+    if executor == "thread":
+        return executor, [list(range(thread_count))]
+    if executor == "process":
+        return executor, [[i] for i in range(process_count)]
+    if executor == "hybrid":
+        return executor, [
+            list(range(i * thread_count, (i + 1) * thread_count))
+            for i in range(process_count)
+        ]
+    raise ValueError(f"不支持的执行后端: {executor}，可选值: thread, process, hybrid")
+
+
+def _collect_results(report_queue, handles, worker_count, monitor, ledger, finish_event):
+    """
+    从汇报队列收集所有工作线程的统计快照与结果。
+
+    必须在 join 子进程之前取空队列，否则子进程可能因队列缓冲未刷出而无法退出；
+    若线程/进程全部结束仍有结果缺失（如进程被杀死），则停止等待。
+    第一次 Ctrl+C 设置 finish_event，丢弃尚未领取的任务，等待工作线程写完当前文件；第二次 Ctrl+C 直接抛出。
+
+    :param handles: 线程或进程对象列表
+    :param worker_count: 期望收到的结果数
+    :param monitor: ProgressMonitor
+    :param ledger: FileLedger
+    :param finish_event: 停止派发新任务的事件
+    :return: {worker_id: result}
+    """
+    results = {}
+    while len(results) < worker_count:
+        try:
+            kind, worker_id, payload = report_queue.get(timeout=0.2)
+        except KeyboardInterrupt:
+            if finish_event.is_set():
+                raise
+            finish_event.set()
+            print("收到中断信号，停止派发新任务，等待工作线程写完当前文件后退出（再次按 Ctrl+C 立即退出）...")
+            continue
+        except queue.Empty:
+            if not any(handle.is_alive() for handle in handles) and report_queue.empty():
+                # 给已退出进程的队列缓冲一次刷出的机会
+                try:
+                    kind, worker_id, payload = report_queue.get(timeout=0.2)
+                except queue.Empty:
+                    break
+            else:
+                monitor.tick()
+                continue
+        if kind == "stats":
+            monitor.update(worker_id, payload)
+        elif kind == "file":
+            ledger.complete(*payload)
+        else:
+            results[worker_id] = payload
+            monitor.update(worker_id, payload["stats"])
+        monitor.tick()
+    for handle in handles:
+        handle.join()
+    return results
+
+
+def write_data_to_files(total_volume_limit=1024*1024*1024, output_dir='.'): 
+    """
+    按 CONFIG["executor"] 指定的后端多线程/多进程生成随机文件，生成文件的总体积恰好等于指定上限；
+    启用目标占用率模式时，写到输出目录所在文件系统达到目标占用率为止。
+
+    :param total_volume_limit: 生成文件的总体积，单位为字节，默认为 1GB；目标占用率模式下忽略
+    :param output_dir: 输出目录，默认为当前工作目录
+    :return: 汇总结果，包含 bytes、files、errors、各工作线程的结果 workers 以及统计报告 report
+    """
+    executor, groups = _plan_worker_groups()
+    check_write_config(CONFIG["write"])
+    if CONFIG["payload"].get("per_file_seed"):
+        if CONFIG["payload"]["mode"] == "urandom":
+            raise ValueError("urandom 模式的数据不可复现，不能启用 per_file_seed")
+        if not CONFIG["manifest"]["enabled"] and not FileNamer(output_dir).has_field("seed"):
+            print("警告：未启用文件清单，文件名模板中也没有 seed 变量，生成的文件无法校验")
+    worker_count = sum(len(group) for group in groups)
+    # 确保输出目录及目录布局中的子目录存在
+    prepare_layout(output_dir, CONFIG["layout"])
+    # 文件清单：续写时扣除已完成的体积，并删除上次没有写完的文件
+    manifest_path = None
+    completed = []
+    if CONFIG["manifest"]["enabled"]:
+        manifest_path = CONFIG["manifest"]["path"] or os.path.join(output_dir, MANIFEST_NAME)
+        if CONFIG["manifest"]["resume"] and os.path.exists(manifest_path):
+            completed = resume_from_manifest(manifest_path, output_dir)
+            completed_volume = sum(size for _, size in completed)
+            total_volume_limit = max(total_volume_limit - completed_volume, 0)
+            print(f"从清单续写：已完成 {len(completed)} 个文件 {completed_volume / MB:.1f}MB，"
+                  f"剩余 {total_volume_limit / MB:.1f}MB")
+    # 全局令牌桶放在共享内存中，由所有工作线程/进程共用
+    rate_buckets = None
+    if RateShaper.enabled(CONFIG["rate"]):
+        rate_buckets = make_rate_buckets(CONFIG["rate"], time.monotonic())
+    # 有界任务队列，空闲的工作线程从中领取任务，每个线程预留少量任务以减少等待
+    if executor == "thread":
+        report_queue = queue.Queue()
+        job_queue = queue.Queue(maxsize=worker_count * 2)
+        handles = _start_threads(report_queue, output_dir, job_queue, groups[0], rate_buckets, manifest_path)
+    else:
+        report_queue = multiprocessing.Queue()
+        job_queue = multiprocessing.Queue(maxsize=worker_count * 2)
+        handles = []
+        for group in groups:
+            process = multiprocessing.Process(
+                target=_process_main,
+                args=(CONFIG, report_queue, output_dir, job_queue, group, rate_buckets, manifest_path)
+            )
+            handles.append(process)
+            process.start()
+    # 启动任务投递线程，按需规划文件任务
+    monitor = ProgressMonitor(CONFIG["report"]["interval"])
+    ledger_manifest = None if manifest_path is None else Manifest(manifest_path, output_dir)
+    ledger = FileLedger(ledger_manifest)
+    ledger.preload(completed)
+    stop_event = threading.Event()
+    finish_event = threading.Event()
+    if CONFIG["occupancy"]["enabled"]:
+        jobs = plan_occupancy_jobs(output_dir, ledger, finish_event)
+    else:
+        jobs = plan_file_jobs(total_volume_limit)
+    feeder = threading.Thread(
+        target=_feed_jobs,
+        args=(job_queue, jobs, worker_count, stop_event, finish_event),
+        daemon=True
+    )
+    feeder.start()
+    # 等待所有线程/进程执行完毕并汇总结果
+    try:
+        workers = _collect_results(report_queue, handles, worker_count, monitor, ledger, finish_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        feeder.join()
+        _abort_workers(handles, job_queue, worker_count)
+        raise
+    finally:
+        finish_event.set()
+        stop_event.set()
+    feeder.join()
+    if ledger_manifest is not None:
+        ledger_manifest.close()
+    summary = _new_result()
+    for worker_id in range(worker_count):
+        if worker_id not in workers:
+            summary["errors"].append(f"工作线程 {worker_id} 未返回结果，所在进程可能已异常退出")
+            continue
+        summary["bytes"] += workers[worker_id]["bytes"]
+        summary["files"] += workers[worker_id]["files"]
+        summary["errors"].extend(workers[worker_id]["errors"])
+    summary["workers"] = workers
+    summary["report"] = monitor.report()
+    summary["report"]["executor"] = executor
+    summary["report"]["worker_count"] = worker_count
+    summary["report"]["errors"] = len(summary["errors"])
+    if CONFIG["report"]["json_path"]:
+        with open(CONFIG["report"]["json_path"], "w", encoding="utf-8") as f:
+            json.dump(summary["report"], f, ensure_ascii=False, indent=2)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="生成指定体积的随机二进制文件")
+    subparsers = parser.add_subparsers(dest="command")
+    fill_parser = subparsers.add_parser("fill", help="生成文件（默认命令）")
+    fill_parser.add_argument("--volume", type=int, default=WORKLOAD // MB, help="生成文件的总体积（MB）")
+    fill_parser.add_argument("--output", default=OUTPUT_DIR, help="输出目录")
+    reclaim_parser = subparsers.add_parser("reclaim", help="按清单并行删除生成的文件")
+    reclaim_parser.add_argument("--output", default=OUTPUT_DIR, help="输出目录")
+    reclaim_parser.add_argument("--manifest", default=CONFIG["manifest"]["path"], help="清单文件路径")
+    reclaim_parser.add_argument("--workers", type=int, default=CONFIG["manifest"]["reclaim_workers"], help="删除线程数")
+    reclaim_parser.add_argument("--target-free", type=float, default=None, help="删除到文件系统空闲比例达到该值为止（0 ~ 1）")
+    verify_parser = subparsers.add_parser("verify", help="按文件种子重新生成数据，并行读取校验生成的文件")
+    verify_parser.add_argument("--output", default=OUTPUT_DIR, help="输出目录")
+    verify_parser.add_argument("--manifest", default=CONFIG["manifest"]["path"], help="清单文件路径")
+    verify_parser.add_argument("--workers", type=int, default=CONFIG["verify"]["workers"], help="并行校验数")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        summary = verify_files(args.output, args.manifest, args.workers)
+        for error in summary["errors"]:
+            print(error)
+        print(f"已校验 {summary['files']} 个文件 {summary['bytes'] / MB:.1f}MB，"
+              f"读取吞吐 {summary['throughput_mb_s']:.1f}MB/s，跳过 {summary['skipped']} 个，"
+              f"错误 {len(summary['errors'])} 个")
+        return 1 if summary["errors"] else 0
+
+    if args.command == "reclaim":
+        summary = reclaim_files(args.output, args.manifest, args.workers, args.target_free)
+        for error in summary["errors"]:
+            print(error)
+        print(f"已删除 {summary['files']} 个文件 {summary['bytes'] / MB:.1f}MB，剩余 {summary['remaining']} 个文件")
+        return 1 if summary["errors"] else 0
+
+    volume = args.volume * MB if args.command == "fill" else WORKLOAD
+    output_dir = args.output if args.command == "fill" else OUTPUT_DIR
+    summary = write_data_to_files(total_volume_limit=volume, output_dir=output_dir)
+    print(f"已写入 {summary['files']} 个文件 {summary['bytes'] / MB:.1f}MB，错误 {len(summary['errors'])} 个")
+    return 1 if summary["errors"] else 0
+
+
 # 调用写入文件的方法
 if __name__ == "__main__":
-    write_data_to_files(total_volume_limit=WORKLOAD, output_dir=OUTPUT_DIR)
+    sys.exit(main())